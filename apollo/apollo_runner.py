@@ -1,9 +1,10 @@
 import time
 from logging import Logger
-from typing import List, Optional, Set, Tuple
+import numpy as np
+from typing import Callable, List, Optional, Set, Tuple
 from apollo.container import ApolloContainer
-from apollo.cyber_bridge import Topics
-from apollo.utils import PositionEstimate, extract_main_decision, pos_estimate_eq_loc_estimate
+from apollo.cyber_bridge import CyberBridge, Topics
+from apollo.utils import PositionEstimate, extract_main_decision
 from modules.common.proto.geometry_pb2 import Point3D
 from modules.common.proto.header_pb2 import Header
 from modules.localization.proto.localization_pb2 import LocalizationEstimate
@@ -11,10 +12,13 @@ from modules.localization.proto.pose_pb2 import Pose
 from modules.map.proto.map_pb2 import Map
 from modules.planning.proto.planning_pb2 import ADCTrajectory
 from modules.routing.proto.routing_pb2 import LaneWaypoint, RoutingRequest
-from config import HD_MAP, USE_SIM_CONTROL_STANDALONE
+from config import (HD_MAP, SCENARIO_UPPER_LIMIT, USE_SIM_CONTROL_STANDALONE)
 from hdmap.parser import MapParser
 from utils import get_logger
 
+# rate at which SimControl publishes localization, one trajectory point per message
+LOCALIZATION_FREQUENCY = 100
+
 class ApolloRunner:
     """
     Class to manage and run an Apollo instance
@@ -28,15 +32,22 @@ class ApolloRunner:
     logger: Logger
     nid: int
     container: ApolloContainer
+    bridge: CyberBridge
     start: PositionEstimate
     start_time: float
     waypoints: List[PositionEstimate]
+    _start_coord: Point3D
+    _start_heading: float
+    _initial_loc: LocalizationEstimate
     routing_started: bool
     stop_time_counter: float
     localization: Optional[LocalizationEstimate]
     planning: Optional[ADCTrajectory]
     __decisions: Set[Tuple]
-    __coords: List[Tuple]
+    _coords_x: np.ndarray
+    _coords_y: np.ndarray
+    _coords_n: int
+    _decisions_update: Callable[[Set[Tuple]], None]
     __runner_time: int              # Add new variable to count time with ScenarioRunner
 
     def __init__(self,
@@ -55,35 +66,60 @@ class ApolloRunner:
         self.start = start
         self.start_time = start_time
         self.waypoints = waypoints
+        # the start never changes, resolve it on the map only once
+        self._start_coord, self._start_heading = MapParser.get_instance(
+            HD_MAP).get_coordinate_and_heading(start.lane_id, start.s)
+        self._initial_loc = LocalizationEstimate(
+            header=Header(
+                module_name="MAGGIE",
+                sequence_num=0
+            ),
+            pose=Pose(
+                position=self._start_coord,
+                heading=self._start_heading,
+                linear_velocity=Point3D(x=0, y=0, z=0)
+            )
+        )
 
     def register_publishers(self) -> None:
         """
         Register publishers for the cyberRT communication
         """
+        add_publisher = self.bridge.add_publisher
         for c in [Topics.Localization, Topics.Obstacles, Topics.TrafficLight, Topics.RoutingRequest]:
-            self.container.bridge.add_publisher(c)
+            add_publisher(c)
 
     def register_subscribers(self) -> None:
         """
         Register subscribers for the cyberRT communication, using callback functions
         """
-        def lcb(data):
-            """
-            Callback function when localization message is received
-            """
-            self.localization = data
-            self.__coords.append((data.pose.position.x, data.pose.position.y))
+        self.bridge.add_subscriber(Topics.Localization, self._on_localization)
+        self.bridge.add_subscriber(Topics.Planning, self._on_planning)
+
+    def _on_localization(self, data: LocalizationEstimate) -> None:
+        """
+        Callback function when localization message is received
+
+        :param LocalizationEstimate data: the localization message
+        """
+        self.localization = data
+        i = self._coords_n
+        if i == len(self._coords_x):
+            # grow the trajectory buffers by doubling their capacity
+            self._coords_x = np.resize(self._coords_x, 2 * i)
+            self._coords_y = np.resize(self._coords_y, 2 * i)
+        self._coords_x[i] = data.pose.position.x
+        self._coords_y[i] = data.pose.position.y
+        self._coords_n = i + 1
 
-        def pcb(data):
-            """
-            Callback function when planning message is received
-            """
-            self.planning = data
-            decisions = extract_main_decision(data)
-            self.__decisions.update(decisions)
+    def _on_planning(self, data: ADCTrajectory) -> None:
+        """
+        Callback function when planning message is received
 
-        self.container.bridge.add_subscriber(Topics.Localization, lcb)
-        self.container.bridge.add_subscriber(Topics.Planning, pcb)
+        :param ADCTrajectory data: the planning message
+        """
+        self.planning = data
+        self._decisions_update(extract_main_decision(data))
 
     def initialize(self) -> None:
         '''
@@ -93,6 +129,8 @@ class ApolloRunner:
             f'Initializing container {self.container.container_name}')
 
         self.container.reset()
+        # the container opens a new bridge connection on every reset
+        self.bridge = self.container.bridge
         self.register_publishers()
         self.send_initial_localization()
         if not USE_SIM_CONTROL_STANDALONE:
@@ -101,11 +139,16 @@ class ApolloRunner:
         # initialize routing started flag
         self.routing_started = False
         self.__decisions = set()
-        self.__coords = list()
+        # sized for a whole scenario up front, the callback only grows it on overflow
+        self._coords_x = np.empty(int(LOCALIZATION_FREQUENCY * SCENARIO_UPPER_LIMIT * 2), dtype=np.float64)
+        self._coords_y = np.empty_like(self._coords_x)
+        self._coords_n = 0
+        # bind the hot call site of the planning callback once
+        self._decisions_update = self.__decisions.update
         self.planning = None
         self.localization = None
         self.register_subscribers()
-        self.container.bridge.spin()
+        self.bridge.spin()
         self.logger.debug(
             f'Initialized container {self.container.container_name}')
         self.__runner_time = 0  # set initial time to 0, will be updated by ScenarioRunner
@@ -125,30 +168,16 @@ class ApolloRunner:
         Send the instance's initial location to cyberRT
         """
         self.logger.debug('Sending initial localization')
-        ma = MapParser.get_instance(HD_MAP)
-        coord, heading = ma.get_coordinate_and_heading(
-            self.start.lane_id, self.start.s)
-
-        # create localization message
-        loc: LocalizationEstimate = LocalizationEstimate(
-            header=Header(
-                timestamp_sec=time.time(),
-                module_name="MAGGIE",
-                sequence_num=0
-            ),
-            pose=Pose(
-                position=coord,
-                heading=heading,
-                linear_velocity=Point3D(x=0, y=0, z=0)
-            )
-        )
+        loc = self._initial_loc
+        publish = self.bridge.publish
         # Publish 4 messages to the localization channel so 
-        # SimControl can pick these messages up.
+        # SimControl can pick these messages up, then let it settle once.
         for i in range(4):
+            loc.header.timestamp_sec = time.time()
             loc.header.sequence_num = i
-            self.container.bridge.publish(
-                Topics.Localization, loc.SerializeToString())
-            time.sleep(0.5)
+            publish(Topics.Localization, loc.SerializeToString())
+            time.sleep(0.05)
+        time.sleep(0.3)
 
     def send_routing(self) -> None:
         """
@@ -157,9 +186,6 @@ class ApolloRunner:
         self.logger.debug(
             f'Sending routing request to {self.container.container_name}')
         self.routing_started = True
-        ma = MapParser.get_instance(HD_MAP)
-        coord, heading = ma.get_coordinate_and_heading(
-            self.start.lane_id, self.start.s)
 
         # create routing request message
         rr = RoutingRequest(
@@ -170,8 +196,8 @@ class ApolloRunner:
             ),
             waypoint=[
                 LaneWaypoint(
-                    pose=coord,
-                    heading=heading
+                    pose=self._start_coord,
+                    heading=self._start_heading
                 )
             ] + [
                 LaneWaypoint(
@@ -181,7 +207,7 @@ class ApolloRunner:
             ]
         )
 
-        self.container.bridge.publish(
+        self.bridge.publish(
             Topics.RoutingRequest, rr.SerializeToString()
         )
 
@@ -204,24 +230,14 @@ class ApolloRunner:
         """
         return self.__decisions
 
-    def get_trajectory(self) -> List[Tuple]:
+    def get_trajectory(self) -> np.ndarray:
         """
         Get the points traversed by this Apollo instance
 
-        :returns: list of coordinates traversed by this Apollo instance
-        :rtype: List[Tuple[float, float]]
-        """
-        return self.__coords
-
-    def has_arrived_destination(self) -> bool:
+        :returns: (N, 2) array of x, y coordinates traversed by this Apollo instance
+        :rtype: np.ndarray
         """
-        Check if the Apollo instance has arrived at its destination
-
-        :returns: True if arrived, False otherwise
-        :rtype: bool
-        """
-
-        return pos_estimate_eq_loc_estimate(self.waypoints[-1], self.localization)
+        return np.column_stack((self._coords_x[:self._coords_n], self._coords_y[:self._coords_n]))
 
     def update_time(self, t: int) -> None:
         '''
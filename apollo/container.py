@@ -1,5 +1,7 @@
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 import docker
 from apollo.cyber_bridge import CyberBridge
 from apollo.dreamview import Dreamview
@@ -26,6 +28,7 @@ class ApolloContainer:
         """
         self.apollo_root = apollo_root
         self.username = username
+        self.dreamview = None
         self.logger = get_logger(f"ApolloContainer[{self.container_name}]")
 
     @property
@@ -77,8 +80,8 @@ class ApolloContainer:
             env={
                 'USER': self.username
             },
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
         self.logger.debug(f'Started running at {self.ip}')
 
@@ -96,8 +99,10 @@ class ApolloContainer:
         op_name, op_cmd, op_success_info = ops[op]
         self.logger.debug(f'{op_name} Dreamview')
         cmd = f"docker exec {self.container_name} ./scripts/bootstrap.sh {op_cmd}"
-        subprocess.run(cmd.split(), stdout=subprocess.PIPE,
-                       stderr=subprocess.PIPE)
+        subprocess.run(cmd.split(), stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+        if self.dreamview is not None:
+            self.dreamview.close()
         if op == 'stop':
             self.dreamview = None
         else:
@@ -186,7 +191,7 @@ class ApolloContainer:
         self.logger.debug(f"{op_name} required modules")
         cmd = f"docker exec {self.container_name} ./scripts/bootstrap_maggie.sh {op_cmd}"
         subprocess.run(
-            cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         self.logger.debug(f'Modules {op_success_info}')
 
     def start_modules(self) -> None:
@@ -227,7 +232,7 @@ class ApolloContainer:
         self.logger.debug(f"Stopping recorder")
         cmd = f"docker exec {self.container_name} /apollo/bazel-bin/modules/custom_nodes/record_node stop"
         subprocess.run(
-            cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
         )
 
     def start_sim_control_standalone(self) -> None:
@@ -285,7 +290,7 @@ class ApolloContainer:
         """
         self.logger.debug(f'Stopping container')
         cmd = f'docker stop {self.container_name}'
-        subprocess.run(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        subprocess.run(cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         self.logger.debug(f'Stopped container')
 
     def remove_instance(self) -> None:
@@ -294,5 +299,22 @@ class ApolloContainer:
         """
         self.logger.debug(f'Removing container')
         cmd = f'docker rm {self.container_name}'
-        subprocess.run(cmd.split(), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        subprocess.run(cmd.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         self.logger.debug(f'Removed container')
+
+def start_containers(containers: List[ApolloContainer]) -> None:
+    """
+    Starts every container and its Dreamview concurrently, container startup mostly
+    waits on docker so the total time is that of the slowest container
+
+    :param List[ApolloContainer] containers: containers to be started
+    """
+    def start(ctn: ApolloContainer) -> None:
+        ctn.start_instance()
+        ctn.start_dreamview()
+
+    with ThreadPoolExecutor(max_workers=max(1, len(containers))) as pool:
+        # list() re-raises the first exception of any container
+        list(pool.map(start, containers))
+    for ctn in containers:
+        print(f'Dreamview at http://{ctn.ip}:{ctn.port}')
@@ -8,6 +8,10 @@ class Dreamview:
     :param str ip: IP address of Dreamview websocket
     :param int port: port of Dreamview websocket
     """
+    # the commands never change, so they are encoded only once
+    _MSG_START = json.dumps({"type": "StartSimControl"}).encode()
+    _MSG_STOP = json.dumps({"type": "StopSimControl"}).encode()
+    _MSG_RESET = json.dumps({"type": "Reset"}).encode()
 
     def __init__(self, ip: str, port: int) -> None:
         """
@@ -31,22 +35,32 @@ class Dreamview:
         """
         Starts SimControl via websocket
         """
-        self.send_data({
-            "type": "StartSimControl"
-        })
+        self.ws.send(self._MSG_START)
 
     def stop_sim_control(self) -> None:
         """
         Stops SimControl via websocket
         """
-        self.send_data({
-            "type": "StopSimControl"
-        })
+        self.ws.send(self._MSG_STOP)
 
     def reset(self) -> None:
         """
         Resets Dreamview
         """
-        self.send_data({
-            "type": "Reset"
-        })
+        self.ws.send(self._MSG_RESET)
+
+    def close(self) -> None:
+        """
+        Closes the websocket connection
+        """
+        if self.ws.connected:
+            self.ws.close()
+
+    def __del__(self) -> None:
+        """
+        Destructor, makes sure the websocket is not leaked
+        """
+        try:
+            self.close()
+        except Exception:
+            pass
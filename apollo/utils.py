@@ -1,21 +1,32 @@
 import glob
 import math
 import os
+import struct
 import subprocess
 import time
 from dataclasses import dataclass
-from typing import List, Set, Tuple
+from typing import Dict, Iterable, List, Set, Tuple
+import numpy as np
 from shapely.geometry import LineString, Polygon
 from config import (APOLLO_ROOT, APOLLO_VEHICLE_HEIGHT, APOLLO_VEHICLE_LENGTH,
                     APOLLO_VEHICLE_WIDTH, HD_MAP,
                     APOLLO_VEHICLE_back_edge_to_center)
+from apollo.utils_numba import build_polygons
 from hdmap.parser import MapParser
 from modules.common.proto.geometry_pb2 import Point3D
+from modules.common.proto.header_pb2 import Header
 from modules.localization.proto.localization_pb2 import LocalizationEstimate
 from modules.map.proto.map_lane_pb2 import Lane, LaneBoundary
-from modules.perception.proto.perception_obstacle_pb2 import PerceptionObstacle
+from modules.perception.proto.perception_obstacle_pb2 import (PerceptionObstacle,
+                                                              PerceptionObstacles)
 from modules.planning.proto.planning_pb2 import ADCTrajectory
 
+# wire format tags (field_number << 3 | length-delimited) of PerceptionObstacles fields
+_OBSTACLE_FIELD_TAG = bytes([PerceptionObstacles.DESCRIPTOR.fields_by_name['perception_obstacle'].number << 3 | 2])
+_HEADER_FIELD_TAG = bytes([PerceptionObstacles.DESCRIPTOR.fields_by_name['header'].number << 3 | 2])
+_TIMESTAMP_FIELD_NUMBER = PerceptionObstacle.DESCRIPTOR.fields_by_name['timestamp'].number
+_TIMESTAMP_FIELD_TAG = bytes([_TIMESTAMP_FIELD_NUMBER << 3 | 1])
+
 @dataclass
 class PositionEstimate:
     """
@@ -278,6 +289,138 @@ def localization_to_obstacle(_id: int, data: LocalizationEstimate) -> Perception
     )
     return obs
 
+def localizations_to_obstacles(locations: Dict[int, LocalizationEstimate],
+                               buf: np.ndarray) -> Dict[int, PerceptionObstacle]:
+    """
+    Converts the localization of every ADC to PerceptionObstacle at once, the
+    polygons of all ADCs are computed by a single ``build_polygons`` call
+
+    :param Dict[int, LocalizationEstimate] locations: localization messages keyed by obstacle ID
+    :param np.ndarray buf: (N, 6) buffer reused across calls, N must be at least len(locations)
+    :returns: PerceptionObstacle messages keyed by obstacle ID
+    :rtype: Dict[int, PerceptionObstacle]
+    """
+    positions = dict()
+    for i, k in enumerate(locations):
+        # preprocess data, replace NaN with 0.0
+        position = to_Point3D(locations[k].pose.position)
+        buf[i, 0] = position.x
+        buf[i, 1] = position.y
+        buf[i, 2] = position.z
+        buf[i, 3] = locations[k].pose.heading
+        buf[i, 4] = APOLLO_VEHICLE_LENGTH
+        buf[i, 5] = APOLLO_VEHICLE_WIDTH
+        positions[k] = position
+    corners = build_polygons(buf[:len(locations)])
+
+    result = dict()
+    for i, k in enumerate(locations):
+        data = locations[k]
+        z = buf[i, 2]
+        result[k] = PerceptionObstacle(
+            id=k,
+            position=positions[k],
+            theta=data.pose.heading,
+            velocity=to_Point3D(data.pose.linear_velocity),
+            acceleration=to_Point3D(data.pose.linear_acceleration),
+            length=APOLLO_VEHICLE_LENGTH,
+            width=APOLLO_VEHICLE_WIDTH,
+            height=APOLLO_VEHICLE_HEIGHT,
+            type=PerceptionObstacle.VEHICLE,
+            timestamp=data.header.timestamp_sec,
+            tracking_time=1.0,
+            polygon_point=[Point3D(x=x, y=y, z=z) for x, y in corners[i].tolist()]
+        )
+    return result
+
+def _encode_varint(value: int) -> bytes:
+    """
+    Encodes a non-negative integer as protobuf base 128 varint
+
+    :param int value: the integer to be encoded
+    :returns: varint bytes
+    :rtype: bytes
+    """
+    result = bytearray()
+    while value > 0x7F:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.append(value)
+    return bytes(result)
+
+def obstacle_to_field(obs: PerceptionObstacle) -> bytes:
+    """
+    Serializes an obstacle as a ``perception_obstacle`` field of PerceptionObstacles.
+    Repeated message fields are plain concatenated records on the wire, so an obstacle
+    serialized once can be shared by the messages of every receiver.
+
+    :param PerceptionObstacle obs: the obstacle to be serialized
+    :returns: length-delimited field record
+    :rtype: bytes
+    """
+    data = obs.SerializeToString()
+    return _OBSTACLE_FIELD_TAG + _encode_varint(len(data)) + data
+
+def split_obstacle_field(obs: PerceptionObstacle) -> Tuple[bytes, bytes]:
+    """
+    Serializes an obstacle as a ``perception_obstacle`` field of PerceptionObstacles
+    without its timestamp, the bytes around the timestamp can be reused with a fresh
+    timestamp by ``join_obstacle_field`` as long as the other fields do not change
+
+    :param PerceptionObstacle obs: the obstacle to be serialized
+    :returns: field record before and after the timestamp value
+    :rtype: Tuple[bytes, bytes]
+    """
+    before = PerceptionObstacle()
+    before.CopyFrom(obs)
+    after = PerceptionObstacle()
+    after.CopyFrom(obs)
+    for field, _ in obs.ListFields():
+        if field.number >= _TIMESTAMP_FIELD_NUMBER:
+            before.ClearField(field.name)
+        if field.number <= _TIMESTAMP_FIELD_NUMBER:
+            after.ClearField(field.name)
+    head = before.SerializeToString()
+    tail = after.SerializeToString()
+    # a double is encoded as 8 bytes after its 1 byte tag
+    size = len(head) + len(_TIMESTAMP_FIELD_TAG) + 8 + len(tail)
+    return _OBSTACLE_FIELD_TAG + _encode_varint(size) + head + _TIMESTAMP_FIELD_TAG, tail
+
+def join_obstacle_field(parts: Tuple[bytes, bytes], timestamp: float) -> bytes:
+    """
+    Completes a field record created by ``split_obstacle_field`` with a timestamp,
+    the result is identical to ``obstacle_to_field`` of the obstacle with that timestamp
+
+    :param Tuple[bytes, bytes] parts: record created by ``split_obstacle_field``
+    :param float timestamp: timestamp of the obstacle
+    :returns: length-delimited field record
+    :rtype: bytes
+    """
+    return parts[0] + struct.pack('<d', timestamp) + parts[1]
+
+def header_to_field(header: Header) -> bytes:
+    """
+    Serializes a header as the ``header`` field of PerceptionObstacles
+
+    :param Header header: the header to be serialized
+    :returns: length-delimited field record
+    :rtype: bytes
+    """
+    data = header.SerializeToString()
+    return _HEADER_FIELD_TAG + _encode_varint(len(data)) + data
+
+def join_perception_fields(obstacles: Iterable[bytes], header: bytes) -> bytes:
+    """
+    Assembles a serialized PerceptionObstacles message from field records,
+    the result is identical to ``PerceptionObstacles.SerializeToString()``
+
+    :param Iterable[bytes] obstacles: records created by ``obstacle_to_field``
+    :param bytes header: record created by ``header_to_field``
+    :returns: serialized PerceptionObstacles message
+    :rtype: bytes
+    """
+    return b''.join(obstacles) + header
+
 def extract_main_decision(data: ADCTrajectory) -> Set[Tuple]:
     """
     Extracts the main decision from a Planning message
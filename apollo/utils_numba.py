@@ -0,0 +1,156 @@
+import math
+import numpy as np
+from config import APOLLO_VEHICLE_back_edge_to_center
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, fall back to plain python when it is not installed
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
+BACK_EDGE_TO_CENTER = APOLLO_VEHICLE_back_edge_to_center
+
+@njit(cache=True, fastmath=True)
+def build_polygons(xyz_hlw: np.ndarray) -> np.ndarray:
+    """
+    Computes the polygon corners of every ADC in a single call, following the
+    same corner order as ``generate_adc_polygon``
+
+    :param np.ndarray xyz_hlw: (N, 6) array of x, y, z, heading, length and width
+    :returns: (N, 4, 2) array of polygon corners
+    :rtype: np.ndarray
+    """
+    n = xyz_hlw.shape[0]
+    corners = np.empty((n, 4, 2))
+    for i in range(n):
+        x = xyz_hlw[i, 0]
+        y = xyz_hlw[i, 1]
+        sin_h = math.sin(xyz_hlw[i, 3])
+        cos_h = math.cos(xyz_hlw[i, 3])
+        front_l = xyz_hlw[i, 4] - BACK_EDGE_TO_CENTER
+        back_l = -1 * BACK_EDGE_TO_CENTER
+        half_w = xyz_hlw[i, 5] / 2.0
+        corners[i, 0, 0] = x + front_l * cos_h - half_w * sin_h
+        corners[i, 0, 1] = y + front_l * sin_h + half_w * cos_h
+        corners[i, 1, 0] = x + back_l * cos_h - half_w * sin_h
+        corners[i, 1, 1] = y + back_l * sin_h + half_w * cos_h
+        corners[i, 2, 0] = x + back_l * cos_h + half_w * sin_h
+        corners[i, 2, 1] = y + back_l * sin_h - half_w * cos_h
+        corners[i, 3, 0] = x + front_l * cos_h + half_w * sin_h
+        corners[i, 3, 1] = y + front_l * sin_h - half_w * cos_h
+    return corners
+
+@njit(cache=True, fastmath=True)
+def pairwise_distances(xy: np.ndarray) -> np.ndarray:
+    """
+    Computes the euclidean distance between every pair of points
+
+    :param np.ndarray xy: (N, 2) array of x and y
+    :returns: (N, N) symmetric distance matrix
+    :rtype: np.ndarray
+    """
+    n = xy.shape[0]
+    dists = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            d = math.hypot(xy[i, 0] - xy[j, 0], xy[i, 1] - xy[j, 1])
+            dists[i, j] = d
+            dists[j, i] = d
+    return dists
+
+@njit(cache=True, fastmath=True)
+def _point_segment_distance(px: float, py: float, ax: float, ay: float,
+                            bx: float, by: float) -> float:
+    """
+    Computes the euclidean distance from a point to a segment
+
+    :param float px: x of the point
+    :param float py: y of the point
+    :param float ax: x of the segment start
+    :param float ay: y of the segment start
+    :param float bx: x of the segment end
+    :param float by: y of the segment end
+    :returns: distance from the point to the segment
+    :rtype: float
+    """
+    dx = bx - ax
+    dy = by - ay
+    len2 = dx * dx + dy * dy
+    t = 0.0
+    if len2 > 0.0:
+        t = ((px - ax) * dx + (py - ay) * dy) / len2
+        t = min(max(t, 0.0), 1.0)
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+@njit(cache=True, fastmath=True)
+def _is_separated(a: np.ndarray, b: np.ndarray) -> bool:
+    """
+    Separating axis test of two convex polygons using the edge normals of ``a``
+
+    :param np.ndarray a: (K, 2) corners of the first polygon
+    :param np.ndarray b: (K, 2) corners of the second polygon
+    :returns: True if an edge normal of ``a`` separates the polygons
+    :rtype: bool
+    """
+    k = a.shape[0]
+    for e in range(k):
+        nx = a[(e + 1) % k, 1] - a[e, 1]
+        ny = a[e, 0] - a[(e + 1) % k, 0]
+        min_a = max_a = a[0, 0] * nx + a[0, 1] * ny
+        min_b = max_b = b[0, 0] * nx + b[0, 1] * ny
+        for v in range(1, k):
+            pa = a[v, 0] * nx + a[v, 1] * ny
+            pb = b[v, 0] * nx + b[v, 1] * ny
+            min_a = min(min_a, pa)
+            max_a = max(max_a, pa)
+            min_b = min(min_b, pb)
+            max_b = max(max_b, pb)
+        if max_a < min_b or max_b < min_a:
+            return True
+    return False
+
+@njit(cache=True, fastmath=True)
+def polygon_distances(corners: np.ndarray) -> np.ndarray:
+    """
+    Computes the distance between every pair of convex polygons, such as the
+    ADC polygons from ``build_polygons``. Same as shapely ``distance``, it is 0
+    when the polygons touch or overlap
+
+    :param np.ndarray corners: (N, K, 2) array of polygon corners
+    :returns: (N, N) symmetric distance matrix
+    :rtype: np.ndarray
+    """
+    n = corners.shape[0]
+    k = corners.shape[1]
+    dists = np.zeros((n, n))
+    for i in range(n):
+        a = corners[i]
+        for j in range(i + 1, n):
+            b = corners[j]
+            if not (_is_separated(a, b) or _is_separated(b, a)):
+                continue
+            # separated convex polygons, the closest points are a corner and an edge
+            d = np.inf
+            for v in range(k):
+                for e in range(k):
+                    w = (e + 1) % k
+                    d = min(d, _point_segment_distance(a[v, 0], a[v, 1], b[e, 0], b[e, 1], b[w, 0], b[w, 1]))
+                    d = min(d, _point_segment_distance(b[v, 0], b[v, 1], a[e, 0], a[e, 1], a[w, 0], a[w, 1]))
+            dists[i, j] = d
+            dists[j, i] = d
+    return dists
+
+def warm_up() -> None:
+    """
+    Compiles every kernel with tiny inputs, so the first compilation (or loading it
+    from the on-disk cache) happens before a scenario starts rather than in its first cycles
+    """
+    xyz_hlw = np.zeros((2, 6))
+    xyz_hlw[:, 4] = 1.0
+    xyz_hlw[:, 5] = 1.0
+    corners = build_polygons(xyz_hlw)
+    polygon_distances(corners)
+    pairwise_distances(xyz_hlw[:, :2].copy())
@@ -1,16 +1,30 @@
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from logging import Logger
-from threading import Thread
-from typing import List
+from threading import Event, Thread
+from typing import Callable, Dict, List, Tuple
+import numpy as np
 from apollo.apollo_runner import ApolloRunner
 from apollo.cyber_bridge import Channel, Topics
-from apollo.utils import localization_to_obstacle, obstacle_to_polygon
-from config import PERCEPTION_FREQUENCY
+from apollo.utils import (header_to_field, join_obstacle_field, join_perception_fields,
+                          localizations_to_obstacles, obstacle_to_field,
+                          split_obstacle_field)
+from config import PERCEPTION_DUPLICATE_WINDOW, PERCEPTION_FREQUENCY
 from scenario.pd_manager import PedestrianManager
 from modules.common.proto.header_pb2 import Header
-from modules.perception.proto.perception_obstacle_pb2 import \
-    PerceptionObstacles
+from modules.localization.proto.localization_pb2 import LocalizationEstimate
+from modules.perception.proto.perception_obstacle_pb2 import PerceptionObstacle
 from utils import get_logger
+from google.protobuf.internal import api_implementation
+
+if api_implementation.Type() != 'cpp':
+    # perception messages are serialized on every tick, the pure python backend
+    # is an order of magnitude slower than the C++ one
+    get_logger('MessageBroker').warning(
+        f'protobuf is using the {api_implementation.Type()} backend, '
+        'set PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=cpp with a protobuf build '
+        'that ships the C++ extension for faster perception messages'
+    )
 
 class MessageBroker:
     """
@@ -24,6 +38,15 @@ class MessageBroker:
     spinning: bool
     logger: Logger
     t: Thread
+    _stop_evt: Event
+    _pos_buf: np.ndarray
+    _pool: ThreadPoolExecutor
+    _header: Header
+    _publish_fns: Dict[int, Callable[[Channel, bytes], None]]
+    _get_pedestrians: Callable[[float], List[PerceptionObstacle]]
+    _obs_cache: Dict[int, Tuple[LocalizationEstimate, PerceptionObstacle, bytes]]
+    _pd_cache: Dict[int, Tuple[Tuple[float, ...], Tuple[bytes, bytes]]]
+    _last_sent: Dict[int, Tuple[Tuple, float]]
 
     def __init__(self, runners: List[ApolloRunner]) -> None:
         """
@@ -32,6 +55,18 @@ class MessageBroker:
         self.runners = runners
         self.spinning = False
         self.logger = get_logger('MessageBroker')
+        # set by stop() to wake up sleeping threads immediately
+        self._stop_evt = Event()
+        # position buffer reused by every tick to compute obstacle polygons
+        self._pos_buf = np.zeros((len(runners), 6))
+        # header reused by every tick, only its timestamp and sequence number change
+        self._header = Header(module_name='MAGGIE')
+        # latest localization of each runner with its obstacle and serialized field
+        self._obs_cache = dict()
+        # pose signature of each pedestrian with its serialized field split around the timestamp
+        self._pd_cache = dict()
+        # content signature and monotonic time of the last message sent to each instance
+        self._last_sent = dict()
 
     def broadcast(self, channel: Channel, data: bytes) -> None:
         """
@@ -41,7 +76,212 @@ class MessageBroker:
         :param bytes data: data to be sent
         """
         for runner in self.runners:
-            runner.container.bridge.publish(channel, data)
+            runner.bridge.publish(channel, data)
+
+    def _encode_header(self, sequence_num: int) -> bytes:
+        """
+        Stamps the reused header and serializes it as a PerceptionObstacles field
+
+        :param int sequence_num: sequence number of the current tick
+        :returns: length-delimited header field
+        :rtype: bytes
+        """
+        self._header.timestamp_sec = time.time()
+        self._header.sequence_num = sequence_num
+        return header_to_field(self._header)
+
+    def _publish_obstacles(self, messages: List[Tuple[ApolloRunner, bytes]]) -> None:
+        """
+        Publishes perception messages to their receivers concurrently and waits
+        until every message is sent, so a tick costs the slowest publish instead
+        of the sum of all of them
+
+        :param List[Tuple[ApolloRunner, bytes]] messages: receivers and their serialized messages
+        """
+        futures = [
+            self._pool.submit(self._publish_fns[runner.nid], Topics.Obstacles, data)
+            for runner, data in messages
+        ]
+        wait(futures)
+        for f in futures:
+            f.result()
+
+    def _wait_next_tick(self, next_tick: float) -> float:
+        """
+        Sleeps until the deadline of the next tick. The deadline advances by a fixed
+        period so the time spent on publishing does not lower the perception frequency,
+        ticks that have already been missed are dropped instead of being caught up.
+        The sleep returns early once the broker is stopped.
+
+        :param float next_tick: monotonic deadline of the current tick
+        :returns: monotonic deadline of the next tick
+        :rtype: float
+        """
+        next_tick += 1/PERCEPTION_FREQUENCY
+        sleep_for = next_tick - time.monotonic()
+        if sleep_for > 0:
+            self._stop_evt.wait(sleep_for)
+        else:
+            next_tick = time.monotonic()
+        return next_tick
+
+    def _gather_state(self, curr_time: float) -> Tuple[Dict[int, PerceptionObstacle], List[PerceptionObstacle]]:
+        """
+        Collects the obstacles of the current tick
+
+        :param float curr_time: the amount of time since the broker started spinning
+        :returns: ADC obstacles keyed by runner ID, and pedestrian obstacles
+        :rtype: Tuple[Dict[int, PerceptionObstacle], List[PerceptionObstacle]]
+        """
+        # retrieve localization of running instances
+        locations = dict()
+        for runner in self.runners:
+            loc = runner.localization
+            if loc and loc.header.module_name == 'SimControl':
+                locations[runner.nid] = loc
+
+        # convert localization into obstacles
+        obs = self._to_obstacles(locations)
+
+        # pedestrian obstacles
+        pds = self._get_pedestrians(curr_time)
+        return obs, pds
+
+    def _to_obstacles(self, locations: Dict[int, LocalizationEstimate]) -> Dict[int, PerceptionObstacle]:
+        """
+        Converts localization of running instances into obstacles
+
+        :param Dict[int, LocalizationEstimate] locations: localization keyed by runner ID
+        :returns: obstacles keyed by runner ID
+        :rtype: Dict[int, PerceptionObstacle]
+        """
+        # a new localization message is a new object, anything else
+        # has already been converted and serialized on a previous tick
+        fresh = {
+            k: loc for k, loc in locations.items()
+            if k not in self._obs_cache or self._obs_cache[k][0] is not loc
+        }
+        if fresh:
+            for k, ob in localizations_to_obstacles(fresh, self._pos_buf).items():
+                self._obs_cache[k] = (fresh[k], ob, obstacle_to_field(ob))
+        return {k: self._obs_cache[k][1] for k in locations}
+
+    def _obstacle_to_field(self, _id: int, ob: PerceptionObstacle) -> bytes:
+        """
+        Serializes an obstacle as a PerceptionObstacles field, reusing the cached
+        bytes when the obstacle has not changed since it was last serialized
+
+        :param int _id: ID of the obstacle
+        :param PerceptionObstacle ob: the obstacle to be serialized
+        :returns: length-delimited obstacle field
+        :rtype: bytes
+        """
+        cached = self._obs_cache.get(_id)
+        if cached is not None and cached[1] is ob:
+            return cached[2]
+        return obstacle_to_field(ob)
+
+    def _pedestrian_to_field(self, ob: PerceptionObstacle) -> bytes:
+        """
+        Serializes a pedestrian as a PerceptionObstacles field, reusing the bytes of
+        the previous tick when the pedestrian has neither moved nor changed its speed,
+        e.g. before it starts walking or after it reaches the end of its route.
+        The timestamp is always taken from the current obstacle
+
+        :param PerceptionObstacle ob: the pedestrian to be serialized
+        :returns: length-delimited obstacle field
+        :rtype: bytes
+        """
+        signature = (ob.position.x, ob.position.y, ob.theta, ob.velocity.x, ob.velocity.y)
+        cached = self._pd_cache.get(ob.id)
+        if cached is None or cached[0] != signature:
+            cached = (signature, split_obstacle_field(ob))
+            self._pd_cache[ob.id] = cached
+        return join_obstacle_field(cached[1], ob.timestamp)
+
+    @staticmethod
+    def _pose_signature(ob: PerceptionObstacle) -> Tuple:
+        """
+        Summarizes what an obstacle looks like to a receiver, at centimeter precision
+
+        :param PerceptionObstacle ob: the obstacle
+        :returns: ID, position, heading and velocity of the obstacle
+        :rtype: Tuple
+        """
+        return (ob.id, round(ob.position.x, 2), round(ob.position.y, 2), round(ob.theta, 3),
+                round(ob.velocity.x, 2), round(ob.velocity.y, 2))
+
+    def _is_duplicate(self, nid: int, signature: Tuple, now: float) -> bool:
+        """
+        Checks whether an instance has recently been sent the same obstacles, in that
+        case the message is skipped to save the bridge and Apollo the extra work. A message
+        is always sent once PERCEPTION_DUPLICATE_WINDOW has passed since the last one.
+
+        :param int nid: ID of the receiver
+        :param Tuple signature: signatures of the obstacles in the message
+        :param float now: monotonic time of the current tick
+        :returns: True if the message should be skipped, False otherwise
+        :rtype: bool
+        """
+        last = self._last_sent.get(nid)
+        if last is not None and last[0] == signature and now - last[1] < PERCEPTION_DUPLICATE_WINDOW:
+            return True
+        self._last_sent[nid] = (signature, now)
+        return False
+
+    def _select(self, obs: Dict[int, PerceptionObstacle]) -> Dict[int, Tuple[int, ...]]:
+        """
+        Decides which ADC obstacles each instance receives, every other ADC by default
+
+        :param Dict[int, PerceptionObstacle] obs: obstacles keyed by runner ID
+        :returns: IDs of the received obstacles keyed by the receiver ID
+        :rtype: Dict[int, Tuple[int, ...]]
+        """
+        ids = tuple(obs)
+        index = {k: i for i, k in enumerate(ids)}
+        selection: Dict[int, Tuple[int, ...]] = dict()
+        for runner in self.runners:
+            i = index.get(runner.nid)
+            selection[runner.nid] = ids if i is None else ids[:i] + ids[i + 1:]
+        return selection
+
+    def _publish_batch(self, selection: Dict[int, Tuple[int, ...]], obs: Dict[int, PerceptionObstacle],
+                       pds: List[PerceptionObstacle], header_sequence_num: int) -> None:
+        """
+        Serializes and publishes the perception messages of the current tick
+
+        :param Dict[int, Tuple[int, ...]] selection: IDs of the received obstacles keyed by the receiver ID
+        :param Dict[int, PerceptionObstacle] obs: obstacles keyed by runner ID
+        :param List[PerceptionObstacle] pds: pedestrian obstacles
+        :param int header_sequence_num: sequence number of the current tick
+        """
+        # serialize each obstacle and the header once per tick,
+        # receivers with the same set of obstacles share one message
+        obs_fields = {k: self._obstacle_to_field(k, obs[k]) for k in obs}
+        # pedestrians are the same for every receiver, join them once
+        pds_fields = b''.join(self._pedestrian_to_field(x) for x in pds)
+        header = self._encode_header(header_sequence_num)
+        messages: Dict[Tuple[int, ...], bytes] = dict()
+        obs_sigs = {k: self._pose_signature(obs[k]) for k in obs}
+        pds_sig = tuple(self._pose_signature(x) for x in pds)
+        signatures: Dict[Tuple[int, ...], Tuple] = dict()
+        now = time.monotonic()
+
+        # publish obstacle to all running instances
+        outgoing = list()
+        for runner in self.runners:
+            key = selection[runner.nid]
+            if key not in signatures:
+                signatures[key] = tuple(obs_sigs[x] for x in key) + pds_sig
+            if self._is_duplicate(runner.nid, signatures[key], now):
+                continue
+            if key not in messages:
+                obs_bytes = [obs_fields[x] for x in key]
+                obs_bytes.append(pds_fields)
+                messages[key] = join_perception_fields(obs_bytes, header)
+            outgoing.append((runner, messages[key]))
+        if outgoing:
+            self._publish_obstacles(outgoing)
 
     def _spin(self) -> None:
         """
@@ -49,47 +289,17 @@ class MessageBroker:
         """
         header_sequence_num = 0
         curr_time = 0.0
+        start = time.monotonic()
+        next_tick = start
         while self.spinning:
-            # retrieve localization of running instances
-            locations = dict()
-            for runner in self.runners:
-                loc = runner.localization
-                if loc and loc.header.module_name == 'SimControl':
-                    locations[runner.nid] = runner.localization
-
-            # convert localization into obstacles
-            obs = dict()
-            obs_poly = dict()
-            for k in locations:
-                obs[k] = localization_to_obstacle(k, locations[k])
-                obs_poly[k] = obstacle_to_polygon(obs[k])
-
-            # pedestrian obstacles
-            pm = PedestrianManager.get_instance()
-            pds = pm.get_pedestrians(curr_time)
-
-            # publish obstacle to all running instances
-            for runner in self.runners:
-                perception_obs = [obs[x]
-                                  for x in obs if x != runner.nid] + pds
-                header = Header(
-                    timestamp_sec=time.time(),
-                    module_name='MAGGIE',
-                    sequence_num=header_sequence_num
-                )
-                bag = PerceptionObstacles(
-                    header=header,
-                    perception_obstacle=perception_obs,
-                )
-                runner.container.bridge.publish(
-                    Topics.Obstacles, bag.SerializeToString()
-                )
+            obs, pds = self._gather_state(curr_time)
+            self._publish_batch(self._select(obs), obs, pds, header_sequence_num)
 
             # Note: move the min_distance update to ScenarioRunner for LatencyBroker
 
             header_sequence_num += 1
-            time.sleep(1/PERCEPTION_FREQUENCY)
-            curr_time += 1/PERCEPTION_FREQUENCY
+            next_tick = self._wait_next_tick(next_tick)
+            curr_time = next_tick - start
 
     def spin(self) -> None:
         """
@@ -98,6 +308,13 @@ class MessageBroker:
         self.logger.debug('Starting to spin')
         if self.spinning:
             return
+        self._pool = ThreadPoolExecutor(max_workers=max(1, len(self.runners)))
+        # bridges are replaced whenever a container resets, bind them when spinning starts
+        self._publish_fns = {r.nid: r.bridge.publish for r in self.runners}
+        self._get_pedestrians = PedestrianManager.get_instance().get_pedestrians
+        self._stop_evt.clear()
+        self._pd_cache.clear()
+        self._last_sent.clear()
         self.t = Thread(target=self._spin)
         self.spinning = True
         self.t.start()
@@ -110,4 +327,6 @@ class MessageBroker:
         if not self.spinning:
             return
         self.spinning = False
+        self._stop_evt.set()
         self.t.join()
+        self._pool.shutdown()
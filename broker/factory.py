@@ -3,7 +3,7 @@ from broker.radius import RadiusBroker
 from broker.latency import LatencyBroker
 from broker.noise import NoiseBroker
 from broker.intermittence import IntermittenceBroker
-from typing import Any
+from typing import Any, Callable, Dict, List
 
 class BrokerFactory:
     """
@@ -14,8 +14,16 @@ class BrokerFactory:
     """
     mode: str
     param: Any
+    _ctor: Callable[[List, Any], MessageBroker]
 
     _instance = None
+    _REGISTRY: Dict[str, Callable[[List, Any], MessageBroker]] = {
+        'MessageBroker': lambda r, p: MessageBroker(r),
+        'RadiusBroker': lambda r, p: RadiusBroker(r, p),
+        'LatencyBroker': lambda r, p: LatencyBroker(r, p),
+        'NoiseBroker': lambda r, p: NoiseBroker(r, p, 0, 0, 0),
+        'IntermittenceBroker': lambda r, p: IntermittenceBroker(r, p),
+    }
 
     def __new__(cls):
         """
@@ -34,6 +42,7 @@ class BrokerFactory:
         if not self.__initialized:
             self.mode = None
             self.param = None
+            self._ctor = None
             self.__initialized = True
 
     def set_mode(self, mode: str) -> None:
@@ -42,10 +51,10 @@ class BrokerFactory:
         
         param str mode: Command the working mode for Broker
         """
-        if mode not in ('MessageBroker', 'RadiusBroker', 'LatencyBroker', 'NoiseBroker', 
-                        'IntermittenceBroker'):
+        if mode not in self._REGISTRY:
             raise ValueError("Unexpected mode in BrokerFactory")
         self.mode = mode
+        self._ctor = self._REGISTRY[mode]
 
     def set_param(self, param: float) -> None:
         """
@@ -61,6 +70,7 @@ class BrokerFactory:
         """
         self.mode = None
         self.param = None
+        self._ctor = None
 
     def createbk(self, runners) -> MessageBroker:
         """
@@ -70,15 +80,6 @@ class BrokerFactory:
         returns: a distinct Broker
         rtype: MessageBroker or one of its subclasses
         """
-        if self.mode == 'MessageBroker':
-            return MessageBroker(runners)
-        elif self.mode == 'RadiusBroker':
-            return RadiusBroker(runners, self.param)
-        elif self.mode == 'LatencyBroker':
-            return LatencyBroker(runners, self.param)
-        elif self.mode == 'NoiseBroker':
-            return NoiseBroker(runners, self.param, 0, 0, 0)
-        elif self.mode == 'IntermittenceBroker':
-            return IntermittenceBroker(runners, self.param)
-        else:
+        if self._ctor is None:
             raise ValueError("Unexpected mode in BrokerFactory")
+        return self._ctor(runners, self.param)
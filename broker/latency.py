@@ -1,16 +1,13 @@
 import time
-import queue
+from collections import deque
 from logging import Logger
-from threading import Thread
-from typing import List
+from threading import Event, Thread
+from typing import Any, Deque, Dict, List, Tuple
 from broker import MessageBroker
 from apollo.apollo_runner import ApolloRunner
-from apollo.cyber_bridge import Topics
-from apollo.utils import localization_to_obstacle, obstacle_to_polygon
-from config import PERCEPTION_FREQUENCY
-from scenario.pd_manager import PedestrianManager
+from apollo.utils import header_to_field, join_perception_fields
 from modules.common.proto.header_pb2 import Header
-from modules.perception.proto.perception_obstacle_pb2 import PerceptionObstacles
+from modules.perception.proto.perception_obstacle_pb2 import PerceptionObstacle
 from utils import get_logger
 
 class LatencyBroker(MessageBroker):
@@ -26,7 +23,9 @@ class LatencyBroker(MessageBroker):
     logger: Logger
     t: Thread
     delay_thread: Thread
-    message_queue: queue.Queue
+    _pending: Deque[Tuple[float, int, Any, Any]]
+    _ready: Event
+    _delay_header: Header
 
     def __init__(self, runners: List[ApolloRunner], latency: float) -> None:
         """
@@ -35,97 +34,104 @@ class LatencyBroker(MessageBroker):
         super().__init__(runners)
         self.latency = latency
         self.logger = get_logger(self.__class__.__name__)
-        self.message_queue = queue.Queue()
+        # pending ticks, the latency is constant so deadlines are already in order.
+        # the spin thread is the only producer and the delay worker the only consumer,
+        # deque append/popleft are atomic so no lock is needed around the queue
+        self._pending = deque()
+        # set by the producer after queueing a tick, only used to wake up the worker
+        self._ready = Event()
         self.delay_thread = None
+        # the delay worker stamps its own header, self._header belongs to the spin thread
+        self._delay_header = Header(module_name='MAGGIE')
 
     def _delay_worker(self) -> None:
         """
-        Worker thread to handle delayed message publishing
+        Worker thread to handle delayed message publishing, it sleeps exactly
+        until the earliest deadline instead of polling the pending messages
         """
         while self.spinning:
-            try:
-                # Get message from queue with timeout
-                message_data = self.message_queue.get(timeout=0.1)
-                if message_data is None:  # Shutdown signal
-                    break
-                
-                runner_nid, perception_obs, header_sequence_num = message_data
-                
-                # Wait for the specified latency
-                time.sleep(self.latency)
-                
-                # Publish the delayed message
-                header = Header(
-                    timestamp_sec=time.time(),
-                    module_name='MAGGIE',
-                    sequence_num=header_sequence_num
-                )
-                bag = PerceptionObstacles(
-                    header=header,
-                    perception_obstacle=perception_obs,
-                )
-                
-                # Find the corresponding runner and publish
-                for runner in self.runners:
-                    if runner.nid == runner_nid:
-                        runner.container.bridge.publish(
-                            Topics.Obstacles, bag.SerializeToString()
-                        )
-                        break
-                        
-            except queue.Empty:
+            if not self._pending:
+                self._ready.clear()
+                # check again after clearing, a tick queued in between must not be missed
+                if not self._pending:
+                    self._ready.wait()
+                continue
+            deadline, header_sequence_num, batch, encoded = self._pending[0]
+            delta = deadline - time.monotonic()
+            if delta > 0:
+                # nothing queued later can be due earlier, sleep until the deadline
+                self._stop_evt.wait(delta)
                 continue
+            self._pending.popleft()
+
+            try:
+                # Publish the delayed messages of the whole tick, obstacles are already
+                # serialized so only one header is encoded at publishing time
+                self._delay_header.timestamp_sec = time.time()
+                self._delay_header.sequence_num = header_sequence_num
+                header = header_to_field(self._delay_header)
+                messages = {
+                    key: join_perception_fields([fields], header)
+                    for key, fields in encoded.items()
+                }
+                self._publish_obstacles([(runner, messages[key]) for runner, key in batch])
             except Exception as e:
                 self.logger.error(f"Error in delay worker: {e}")
 
+    def _select(self, obs: Dict[int, PerceptionObstacle]) -> Dict[int, Tuple[int, ...]]:
+        """
+        Modified _select() function, an instance that has not been localized yet
+        receives nothing but pedestrians
+        """
+        ids = tuple(obs)
+        index = {k: i for i, k in enumerate(ids)}
+        selection: Dict[int, Tuple[int, ...]] = dict()
+        for runner in self.runners:
+            i = index.get(runner.nid)
+            selection[runner.nid] = () if i is None else ids[:i] + ids[i + 1:]
+        return selection
+
+    def _publish_batch(self, selection: Dict[int, Tuple[int, ...]], obs: Dict[int, PerceptionObstacle],
+                       pds: List[PerceptionObstacle], header_sequence_num: int) -> None:
+        """
+        Modified _publish_batch() function to queue perception messages for delayed publishing
+        """
+        # serialize each obstacle once per tick,
+        # receivers with the same set of obstacles share the encoded fields
+        obs_fields = {k: self._obstacle_to_field(k, obs[k]) for k in obs}
+        pds_fields = b''.join(self._pedestrian_to_field(x) for x in pds)
+        encoded: Dict[Tuple[int, ...], bytes] = dict()
+        obs_sigs = {k: self._pose_signature(obs[k]) for k in obs}
+        pds_sig = tuple(self._pose_signature(x) for x in pds)
+        signatures: Dict[Tuple[int, ...], Tuple] = dict()
+        now = time.monotonic()
+
+        batch = list()
+        for runner in self.runners:
+            key = selection[runner.nid]
+            if key not in signatures:
+                signatures[key] = tuple(obs_sigs[i] for i in key) + pds_sig
+            # duplicates are dropped before queueing, the delay keeps the spacing the same
+            if self._is_duplicate(runner.nid, signatures[key], now):
+                continue
+            if key not in encoded:
+                encoded[key] = b''.join(obs_fields[i] for i in key) + pds_fields
+            batch.append((runner, key))
+        if not batch:
+            return
+        # Schedule the messages of this tick for delayed publishing
+        deadline = now + self.latency
+        self._pending.append((deadline, header_sequence_num, batch, encoded))
+        self._ready.set()
+
     def _spin(self) -> None:
         """
         Modified _spin() function to implement latency of perception messages
         """
-        header_sequence_num = 0
-        curr_time = 0.0
-        
         # Start delay worker thread
         self.delay_thread = Thread(target=self._delay_worker)
         self.delay_thread.start()
-        
-        while self.spinning:
-            # retrieve localization of running instances
-            locations = dict()
-            for runner in self.runners:
-                loc = runner.localization
-                if loc and loc.header.module_name == 'SimControl':
-                    locations[runner.nid] = runner.localization
-            
-            # convert localization into obstacles
-            obs = dict()
-            obs_poly = dict()
-            for k in locations:
-                obs[k] = localization_to_obstacle(k, locations[k])
-                obs_poly[k] = obstacle_to_polygon(obs[k])
-
-            # pedestrian obstacles
-            pm = PedestrianManager.get_instance()
-            pds = pm.get_pedestrians(curr_time)
-
-            # collect perception obj messages and queue them for delayed publishing
-            for runner in self.runners:
-                perception_obs = []
-                for i in obs_poly:
-                    if i == runner.nid:    # exclude ego vehicle
-                        continue
-                    if runner.nid in obs_poly and i in obs_poly:
-                        perception_obs.append(obs[i])
-                perception_obs += pds      # add pedestrian obstacles
-                
-                # Queue the message for delayed publishing
-                self.message_queue.put((runner.nid, perception_obs, header_sequence_num))
-
-            # Note: move the min_distance update to ScenarioRunner for LatencyBroker
-
-            header_sequence_num += 1
-            time.sleep(1/PERCEPTION_FREQUENCY)
-            curr_time += 1/PERCEPTION_FREQUENCY
+        super()._spin()
 
     def stop(self) -> None:
         """
@@ -135,14 +141,17 @@ class LatencyBroker(MessageBroker):
         if not self.spinning:
             return
         self.spinning = False
-        
-        # Signal delay worker to stop
-        if self.delay_thread and self.delay_thread.is_alive():
-            self.message_queue.put(None)  # Shutdown signal
-            self.delay_thread.join()
+        self._stop_evt.set()
         
         if self.t and self.t.is_alive():
             self.t.join()
 
+        # Wake up delay worker so it notices the broker has stopped
+        if self.delay_thread and self.delay_thread.is_alive():
+            self._ready.set()
+            self.delay_thread.join()
+        self._pending.clear()
+        self._pool.shutdown()
+
     # def broadcast(self, channel: Channel, data: bytes): No need to override
     # def spin(self): No need to override
@@ -1,19 +1,14 @@
-import time
 from logging import Logger
 from threading import Thread
 from typing import List, Dict
-import random
+import numpy as np
 from apollo.apollo_runner import ApolloRunner
-from apollo.cyber_bridge import Topics
 from broker import MessageBroker
-from apollo.utils import to_Point3D, generate_adc_polygon
-from config import PERCEPTION_FREQUENCY, APOLLO_VEHICLE_LENGTH, APOLLO_VEHICLE_WIDTH, APOLLO_VEHICLE_HEIGHT
-from scenario.pd_manager import PedestrianManager
-from modules.common.proto.header_pb2 import Header
-from modules.perception.proto.perception_obstacle_pb2 import \
-    PerceptionObstacles, PerceptionObstacle
+from apollo.utils import to_Point3D
+from apollo.utils_numba import build_polygons
+from config import APOLLO_VEHICLE_LENGTH, APOLLO_VEHICLE_WIDTH, APOLLO_VEHICLE_HEIGHT
+from modules.perception.proto.perception_obstacle_pb2 import PerceptionObstacle
 from modules.localization.proto.localization_pb2 import LocalizationEstimate
-from modules.common.proto.geometry_pb2 import Point3D
 from utils import get_logger
 
 class NoiseBroker(MessageBroker):
@@ -32,6 +27,8 @@ class NoiseBroker(MessageBroker):
     sigma2: float
     sigma3: float
     sigma4: float
+    _rng: np.random.Generator
+    _scales: np.ndarray
     spinning: bool
     logger: Logger
     t: Thread
@@ -47,121 +44,60 @@ class NoiseBroker(MessageBroker):
         self.sigma3 = sigma3
         self.sigma4 = sigma4
         self.logger = get_logger(self.__class__.__name__)
+        # noise of position(x, y), heading, velocity(x, y) and acceleration(x, y)
+        # is drawn for all ADCs at once and scaled column-wise
+        self._rng = np.random.default_rng()
+        self._scales = np.array([sigma1, sigma1, sigma2, sigma3, sigma3, sigma4, sigma4])
 
-    @staticmethod
-    def gaussian_noise(value: float, std_dev: float, scale: float=1.0) -> float:
+    def _to_obstacles(self, locations: Dict[int, LocalizationEstimate]) -> Dict[int, PerceptionObstacle]:
         """
-        Generate Gaussian noise with no bias
-
-        :param float value: original value
-        :param float std_dev: standard deviation of the Gaussian distribution
-        :param float scale: scale of the Gaussian distribution, defaults to 1.0
-        :returns: value with Gaussian noise
-        :rtype: float
-        """
-        return value + scale * random.gauss(mu=0.0, sigma=std_dev)
-
-    def noise_Point3D(self, data: Point3D, std_dev: float, scale: float = 1.0) -> Point3D:
-        """
-        Add noise to Point3D data
-
-        :param Point3D data: original Point3D message
-        :param float std_dev: standard deviation of the Gaussian distribution
-        :param float scale: scale of the Gaussian distribution, defaults to 1.0
-        :returns: Point3D data with noise
-        :rtype: Point3D
+        Modified _to_obstacles() function to convert localization into obstacles, with noise
         """
-        return Point3D(
-            x=self.gaussian_noise(data.x, std_dev, scale),
-            y=self.gaussian_noise(data.y, std_dev, scale),
-            z=data.z
-        )
-
-    def noise_localization_to_obstacle(self, _id: int, data: LocalizationEstimate) -> PerceptionObstacle:
-        """
-        Converts LocalizationEstimate to PerceptionObstacle. The localization message of an ADS
-        instance is used as part of the perception message for other ADS instances.
-
-        :param int _id: ID of the obstacle
-        :param LocalizationEstimate data: localization message of the ADC
-        :returns: PerceptionObstacle message converted from localization of an ADC
-        :rtype: PerceptionObstacle
-        """
-        # preprocess data, replace NaN with 0.0
-        position = to_Point3D(data.pose.position)
-        velocity = to_Point3D(data.pose.linear_velocity)
-        acceleration = to_Point3D(data.pose.linear_acceleration)
-
-        # add noise to position(x, y), heading, velocity and acceleration
-        position_noise = self.noise_Point3D(position, self.sigma1)
-        heading_noise = self.gaussian_noise(data.pose.heading, self.sigma2)
-        velocity_noise = self.noise_Point3D(velocity, self.sigma3)
-        acceleration_noise = self.noise_Point3D(acceleration, self.sigma4)
-
-        # create a PerceptionObstacle obstacle
-        obs = PerceptionObstacle(
-            id=_id,
-            position=position_noise,
-            theta=heading_noise,
-            velocity=velocity_noise,
-            acceleration=acceleration_noise,
-            length=APOLLO_VEHICLE_LENGTH,
-            width=APOLLO_VEHICLE_WIDTH,
-            height=APOLLO_VEHICLE_HEIGHT,
-            type=PerceptionObstacle.VEHICLE,
-            timestamp=data.header.timestamp_sec,
-            tracking_time=1.0,
-            polygon_point=generate_adc_polygon(
-                position_noise, heading_noise)
-        )
+        noise = (self._rng.standard_normal((len(locations), 7)) * self._scales).tolist()
+        buf = self._pos_buf
+        for i, (data, n) in enumerate(zip(locations.values(), noise)):
+            # preprocess data, replace NaN with 0.0
+            position = to_Point3D(data.pose.position)
+            buf[i, 0] = position.x + n[0]
+            buf[i, 1] = position.y + n[1]
+            buf[i, 2] = position.z
+            buf[i, 3] = data.pose.heading + n[2]
+            buf[i, 4] = APOLLO_VEHICLE_LENGTH
+            buf[i, 5] = APOLLO_VEHICLE_WIDTH
+        # polygons of all noisy ADCs are computed in a single call
+        corners = build_polygons(buf[:len(locations)])
+        rows = buf[:len(locations)].tolist()
+
+        obs: Dict[int, PerceptionObstacle] = dict()
+        for i, ((k, data), n) in enumerate(zip(locations.items(), noise)):
+            x, y, z, heading = rows[i][:4]
+            velocity = to_Point3D(data.pose.linear_velocity)
+            acceleration = to_Point3D(data.pose.linear_acceleration)
+            ob = PerceptionObstacle(
+                id=k,
+                theta=heading,
+                length=APOLLO_VEHICLE_LENGTH,
+                width=APOLLO_VEHICLE_WIDTH,
+                height=APOLLO_VEHICLE_HEIGHT,
+                type=PerceptionObstacle.VEHICLE,
+                timestamp=data.header.timestamp_sec,
+                tracking_time=1.0
+            )
+            # write the embedded messages in place rather than building
+            # temporary Point3D messages that would be copied into the obstacle
+            p = ob.position
+            p.x, p.y, p.z = x, y, z
+            p = ob.velocity
+            p.x, p.y, p.z = velocity.x + n[3], velocity.y + n[4], velocity.z
+            p = ob.acceleration
+            p.x, p.y, p.z = acceleration.x + n[5], acceleration.y + n[6], acceleration.z
+            polygon = ob.polygon_point
+            for cx, cy in corners[i].tolist():
+                p = polygon.add()
+                p.x, p.y, p.z = cx, cy, z
+            obs[k] = ob
         return obs
 
-    def _spin(self) -> None:
-        """
-        Helper function to start forwarding localization
-        """
-        header_sequence_num = 0
-        curr_time = 0.0
-        while self.spinning:
-            # retrieve localization of running instances
-            locations = dict()
-            for runner in self.runners:
-                loc: LocalizationEstimate = runner.localization
-                if loc and loc.header.module_name == 'SimControl':
-                    locations[runner.nid] = runner.localization
-
-            # convert localization into obstacles, with noise
-            obs: Dict[int, PerceptionObstacle] = dict()
-            for k in locations:
-                obs[k] = self.noise_localization_to_obstacle(k, locations[k])
-
-            # pedestrian obstacles
-            pm = PedestrianManager.get_instance()
-            pds = pm.get_pedestrians(curr_time)
-
-            # publish obstacle to all running instances
-            for runner in self.runners:
-                perception_obs = [obs[x]
-                                  for x in obs if x != runner.nid] + pds
-                header = Header(
-                    timestamp_sec=time.time(),
-                    module_name='MAGGIE',
-                    sequence_num=header_sequence_num
-                )
-                bag = PerceptionObstacles(
-                    header=header,
-                    perception_obstacle=perception_obs,
-                )
-                runner.container.bridge.publish(
-                    Topics.Obstacles, bag.SerializeToString()
-                )
-
-            # Note: move the min_distance update to ScenarioRunner for LatencyBroker
-
-            header_sequence_num += 1
-            time.sleep(1/PERCEPTION_FREQUENCY)
-            curr_time += 1/PERCEPTION_FREQUENCY
-
     # def broadcast(self, channel: Channel, data: bytes): No need to override
     # def spin(self): No need to override
     # def stop(self): No need to override
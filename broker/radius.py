@@ -1,18 +1,24 @@
-import time
+import math
 from logging import Logger
 from threading import Thread
-from typing import List
+from typing import Dict, List, Tuple
+import numpy as np
 from apollo.apollo_runner import ApolloRunner
-from apollo.cyber_bridge import Topics
 from broker import MessageBroker
-from apollo.utils import localization_to_obstacle, obstacle_to_polygon
-from config import PERCEPTION_FREQUENCY
-from scenario.pd_manager import PedestrianManager
-from modules.common.proto.header_pb2 import Header
-from modules.perception.proto.perception_obstacle_pb2 import \
-    PerceptionObstacles
+from apollo.utils import obstacle_to_polygon
+from apollo.utils_numba import pairwise_distances
+from config import (APOLLO_VEHICLE_LENGTH, APOLLO_VEHICLE_WIDTH,
+                    APOLLO_VEHICLE_back_edge_to_center)
+from modules.perception.proto.perception_obstacle_pb2 import PerceptionObstacle
+from shapely.geometry import Polygon
 from utils import get_logger
 
+# farthest distance from an ADC's position to a corner of its polygon
+_ADC_REACH = math.hypot(
+    max(APOLLO_VEHICLE_LENGTH - APOLLO_VEHICLE_back_edge_to_center, APOLLO_VEHICLE_back_edge_to_center),
+    APOLLO_VEHICLE_WIDTH / 2.0
+)
+
 class RadiusBroker(MessageBroker):
     """
     Modified MessageBroker to implement distance-capability obstacle filtering,
@@ -26,6 +32,7 @@ class RadiusBroker(MessageBroker):
     spinning: bool
     logger: Logger
     t: Thread
+    _poly_cache: Dict[int, Tuple[Tuple[float, float, float], Polygon]]
 
     def __init__(self, runners: List[ApolloRunner], radius: float) -> None:
         """
@@ -34,63 +41,59 @@ class RadiusBroker(MessageBroker):
         super().__init__(runners)
         self.radius = radius
         self.logger = get_logger(self.__class__.__name__)
+        # pose of each ADC with the polygon built for it
+        self._poly_cache = dict()
 
-    def _spin(self) -> None:
-        """
-        Helper function to start forwarding localization
+    def _polygon(self, _id: int, ob: PerceptionObstacle) -> Polygon:
         """
-        header_sequence_num = 0
-        curr_time = 0.0
-        while self.spinning:
-            # retrieve localization of running instances
-            locations = dict()
-            for runner in self.runners:
-                loc = runner.localization
-                if loc and loc.header.module_name == 'SimControl':
-                    locations[runner.nid] = runner.localization
+        Gets the polygon of an ADC obstacle, the previous one is reused when the
+        ADC has not moved since it was built, e.g. while waiting at a junction
 
-            # convert localization into obstacles
-            obs = dict()
-            obs_poly = dict()
-            for k in locations:
-                obs[k] = localization_to_obstacle(k, locations[k])
-                obs_poly[k] = obstacle_to_polygon(obs[k])
+        :param int _id: ID of the obstacle
+        :param PerceptionObstacle ob: the obstacle
+        :returns: a Polygon object representing the obstacle
+        :rtype: Polygon
+        """
+        pose = (ob.position.x, ob.position.y, ob.theta)
+        cached = self._poly_cache.get(_id)
+        if cached is not None and cached[0] == pose:
+            return cached[1]
+        polygon = obstacle_to_polygon(ob)
+        self._poly_cache[_id] = (pose, polygon)
+        return polygon
 
-            # pedestrian obstacles
-            pm = PedestrianManager.get_instance()
-            pds = pm.get_pedestrians(curr_time)
+    def _select(self, obs: Dict[int, PerceptionObstacle]) -> Dict[int, Tuple[int, ...]]:
+        """
+        Modified _select() function to filter out obstacles that are too far away judged by param radius
+        """
+        # the position of an ADC lies inside its polygon, so two polygons are never farther
+        # apart than their positions and never closer than that minus both reaches,
+        # only pairs in between need the exact polygon distance
+        ids = list(obs)
+        centers = np.array([[obs[k].position.x, obs[k].position.y] for k in ids]).reshape(-1, 2)
+        dists = pairwise_distances(centers)
+        near = (dists <= self.radius).tolist()
+        far = (dists > self.radius + 2 * _ADC_REACH).tolist()
+        index = {k: i for i, k in enumerate(ids)}
+        obs_poly = dict()
 
-            # publish obstacle to all running instances
-            # filter out obstacles that are too far away judged by param radius
-            for runner in self.runners:
-                perception_obs = []
-                for i in obs_poly:
-                    if i == runner.nid:    # exclude ego vehicle
+        selection: Dict[int, Tuple[int, ...]] = dict()
+        for runner in self.runners:
+            perception_obs = []
+            if runner.nid in index:
+                r = index[runner.nid]
+                for j, i in enumerate(ids):
+                    if i == runner.nid or far[r][j]:    # exclude ego vehicle and distant ADCs
                         continue
-                    if runner.nid in obs_poly and i in obs_poly:
-                        dist = obs_poly[runner.nid].distance(obs_poly[i])
-                        if dist <= self.radius:
-                            perception_obs.append(obs[i])
-                perception_obs += pds
-
-                header = Header(
-                    timestamp_sec=time.time(),
-                    module_name='MAGGIE',
-                    sequence_num=header_sequence_num
-                )
-                bag = PerceptionObstacles(
-                    header=header,
-                    perception_obstacle=perception_obs,
-                )
-                runner.container.bridge.publish(
-                    Topics.Obstacles, bag.SerializeToString()
-                )
-
-            # Note: move the min_distance update to ScenarioRunner for LatencyBroker
-
-            header_sequence_num += 1
-            time.sleep(1/PERCEPTION_FREQUENCY)
-            curr_time += 1/PERCEPTION_FREQUENCY
+                    if not near[r][j]:
+                        for k in (runner.nid, i):
+                            if k not in obs_poly:
+                                obs_poly[k] = self._polygon(k, obs[k])
+                        if obs_poly[runner.nid].distance(obs_poly[i]) > self.radius:
+                            continue
+                    perception_obs.append(i)
+            selection[runner.nid] = tuple(perception_obs)
+        return selection
 
     # def broadcast(self, channel: Channel, data: bytes): No need to override
     # def spin(self): No need to override
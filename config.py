@@ -5,6 +5,8 @@ from pathlib import Path
 
 PERCEPTION_FREQUENCY = 25
 """Rate at which the Message Broker publishes perception messages"""
+PERCEPTION_DUPLICATE_WINDOW = 0.2
+"""Seconds an unchanged perception message may be withheld from an instance, 0 to always publish"""
 APOLLO_VEHICLE_LENGTH = 4.933
 """Length of default Apollo vehicle"""
 APOLLO_VEHICLE_WIDTH = 2.11
@@ -53,6 +55,9 @@ POP_SIZE = 30
 """Population size for the genetic algorithm"""
 STAGE1 = 5
 """Maximum number of generations in the first stage"""
+CACHE_MIN_DISTANCE = False
+"""Whether to reuse the result of a scenario already simulated with the same broker instead of running it again,
+duplicates are not recorded and Apollo's run-to-run variance is no longer sampled for them"""
 
 ######################## BROKER CONFIGURATION #########################
 
@@ -3,7 +3,7 @@ import json
 from datetime import datetime
 from scenario import Scenario
 from scenario.scenario_runner import ScenarioRunner
-from apollo.container import ApolloContainer
+from apollo.container import ApolloContainer, start_containers
 from hdmap.parser import MapParser
 from broker.factory import BrokerFactory
 from config import HD_MAP, MAX_ADC_COUNT, APOLLO_ROOT, MT_ROOT
@@ -37,10 +37,7 @@ def main():
     # initialize the json replay containers
     containers = [ApolloContainer(
         APOLLO_ROOT, f'ROUTE_{x}') for x in range(MAX_ADC_COUNT)]
-    for ctn in containers:
-        ctn.start_instance()
-        ctn.start_dreamview()
-        print(f'Dreamview at http://{ctn.ip}:{ctn.port}')
+    start_containers(containers)
     srunner = ScenarioRunner(containers)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
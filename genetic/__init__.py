@@ -1,11 +1,52 @@
 from scenario import Scenario
 from scenario.scenario_runner import ScenarioRunner
-from typing import Dict, Tuple
+from broker.factory import BrokerFactory
+from config import CACHE_MIN_DISTANCE
+from typing import Any, Dict, List, Tuple
+
+# min_distance of every scenario simulated so far, keyed by fingerprint and broker
+_min_distance_cache: Dict[Tuple[tuple, str, Any], float] = dict()
+
+def tag_generation(individuals: List[Scenario], gid: int) -> List[Scenario]:
+    """
+    Assigns the generation id and the scenario ids to a batch of individuals
+      and collects the ones that still need to be evaluated in the same pass
+
+    :param List[Scenario] individuals: population or offspring of the generation
+    :param int gid: generation id
+    :returns: individuals without a valid fitness
+    :rtype: List[Scenario]
+    """
+    invalid_ind = list()
+    for index, c in enumerate(individuals):
+        c.gid = gid
+        c.sid = index
+        if not c.fitness.valid:
+            invalid_ind.append(c)
+    return invalid_ind
 
 def min_distance(timestamp: str, ind: Scenario) -> float:
     """
     run the distinct scenario and return the polygonal distance between each adc pair
 
+    :param str timestamp: timestamp of this runtime batch
+    :param Scenario ind: The scenario individual to be evaluated
+    :returns: the minimum distance of the scenario
+    :rtype: float
+    """
+    if CACHE_MIN_DISTANCE:
+        bkf = BrokerFactory()
+        # the parameter is left over from the last follow-up when MessageBroker is used
+        key = (ind.fingerprint(), bkf.mode, None if bkf.mode == 'MessageBroker' else bkf.param)
+        if key not in _min_distance_cache:
+            _min_distance_cache[key] = _run_min_distance(timestamp, ind)
+        return _min_distance_cache[key]
+    return _run_min_distance(timestamp, ind)
+
+def _run_min_distance(timestamp: str, ind: Scenario) -> float:
+    """
+    Simulate the scenario and return its minimum distance, see ``min_distance``
+
     :param str timestamp: timestamp of this runtime batch
     :param Scenario ind: The scenario individual to be evaluated
     :returns: the minimum distance of the scenario
@@ -1,6 +1,5 @@
-from copy import deepcopy
 from random import randint, random, sample, shuffle
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from scenario import Scenario
 from scenario.ad_agents import ADAgent, ADSection
 from scenario.pd_agents import PDSection
@@ -23,23 +22,26 @@ def cx_ad_section(ind1: ADSection, ind2: ADSection) -> Tuple[ADSection, ADSectio
         return ind2, ind1
     cxed = False
 
+    by_routing: Dict[str, List[ADAgent]] = dict()
+    for adc2 in ind2.adcs:
+        by_routing.setdefault(adc2.routing_str, []).append(adc2)
+
     for adc1 in ind1.adcs:
-        for adc2 in ind2.adcs:
-            if adc1.routing_str == adc2.routing_str:
-                # same routing in both parents
-                # swap start_s or start_t with 50% probability
-                if random() < 0.5:
-                    adc1.start_s = adc2.start_s
-                else:
-                    adc1.start_t = adc2.start_t
-                cxed = True
+        for adc2 in by_routing.get(adc1.routing_str, ()):
+            # same routing in both parents
+            # swap start_s or start_t with 50% probability
+            if random() < 0.5:
+                adc1.start_s = adc2.start_s
+            else:
+                adc1.start_t = adc2.start_t
+            cxed = True
     if cxed:
         ind1.adjust_time()
         return ind1, ind2
 
     if len(ind1.adcs) < MAX_ADC_COUNT:
         for adc in ind2.adcs:
-            if ind1.has_conflict(adc) and ind1.add_agent(deepcopy(adc)):
+            if ind1.has_conflict(adc) and ind1.add_agent(adc.clone()):
                 # add an agent from parent 2 to parent 1 if there exists a conflict
                 ind1.adjust_time()
                 return ind1, ind2
@@ -51,7 +53,7 @@ def cx_ad_section(ind1: ADSection, ind2: ADSection) -> Tuple[ADSection, ADSectio
     split_index = randint(2, min(len(available_adcs), MAX_ADC_COUNT))
     result1 = ADSection([])
     for x in available_adcs[:split_index]:
-        result1.add_agent(deepcopy(x))
+        result1.add_agent(x.clone())
 
     # make sure offspring adc count is valid
     while len(result1.adcs) > MAX_ADC_COUNT:
@@ -98,20 +100,13 @@ def cx_tl(ind1: TrafficSection, ind2: TrafficSection) -> Tuple[TrafficSection, T
     :rtype: Tuple[TrafficSection, TrafficSection]
     """
     mp = MapParser.get_instance(HD_MAP)
-    signals = list(mp.get_signals())
+    signals = mp.get_signal_set()
     # randomly select a signal light for crossover
     index = randint(0, len(ind1.tls) - 1)
-    eq_list = list()
-    ne_list = list()
-    for sig in ind1.tls[index].get_eq():
-        if sig in signals:
-            eq_list.append(sig)
-    for sig in ind1.tls[index].get_ne():
-        if sig in signals:
-            ne_list.append(sig)
     # the exchange signal light is composed of the source signal light, the equivalent signal light, and the conflicting signal light
-    exchange_list = [ind1.tls[index].tid] + eq_list + ne_list
-    exchange_set = set(exchange_list)
+    exchange_set = {ind1.tls[index].tid}
+    exchange_set.update(sig for sig in ind1.tls[index].get_eq() if sig in signals)
+    exchange_set.update(sig for sig in ind1.tls[index].get_ne() if sig in signals)
 
     exchange_1: List[TLConfig] = []
     no_change_1: List[TLConfig] = []
@@ -128,13 +123,15 @@ def cx_tl(ind1: TrafficSection, ind2: TrafficSection) -> Tuple[TrafficSection, T
         else:
             no_change_2.append(tl)
 
-    assert set([tl.tid for tl in exchange_1]) == set([tl.tid for tl in exchange_2]), "the exchange signal light is not consistent"
-    assert set([tl.tid for tl in no_change_1]) == set([tl.tid for tl in no_change_2]), "the unchanged signal light is not consistent"
+    if __debug__:
+        assert set(tl.tid for tl in exchange_1) == set(tl.tid for tl in exchange_2), "the exchange signal light is not consistent"
+        assert set(tl.tid for tl in no_change_1) == set(tl.tid for tl in no_change_2), "the unchanged signal light is not consistent"
     tls_1 = exchange_2 + no_change_1
     tls_2 = exchange_1 + no_change_2
     ind1.tls = tls_1
     ind2.tls = tls_2
-    assert set([tl.tid for tl in ind1.tls]) == set([tl.tid for tl in ind2.tls]), "the number of signal lights after crossover is not consistent"
+    if __debug__:
+        assert set(tl.tid for tl in ind1.tls) == set(tl.tid for tl in ind2.tls), "the number of signal lights after crossover is not consistent"
     return ind1, ind2
 
 def cx_tl_section(ind1: TrafficSection, ind2: TrafficSection) -> Tuple[TrafficSection, TrafficSection]:
@@ -1,12 +1,8 @@
-import os
-import pandas as pd
-from copy import deepcopy
 from typing import List, Any, Tuple
 from scenario import Scenario
 from broker.factory import BrokerFactory
-from config import RECORDS_DIR
 from genetic import min_distance
-from utils import BK_FILE_MAP
+from utils import append_csv_row, result_csv_path
 
 def eval_stage_1(ind: Scenario, timestamp: str, param_list: List[Any], bk_type: str, mode: str) -> float:
     """
@@ -27,25 +23,17 @@ def eval_stage_1(ind: Scenario, timestamp: str, param_list: List[Any], bk_type:
     # calculate the min_distance of the source test case
     ori_min_dist: float = min_distance(timestamp, ind)
     # write the result to csv file
-    result = list()
-    result.append(f'Generation:{ind.gid}')
-    result.append(f'Individual:{ind.sid}')
-    if bk_type == 'RadiusBroker':
-        result.append(float('inf'))
-    else:
-        result.append(0)         # param[0]
-    result.append(ori_min_dist)  # dist[0]
-    result.append(0)             # diff[0], not used
+    result = [
+        f'Generation:{ind.gid}',
+        f'Individual:{ind.sid}',
+        float('inf') if bk_type == 'RadiusBroker' else 0,   # param[0]
+        ori_min_dist,                                       # dist[0]
+        0,                                                  # diff[0], not used
+    ]
     for param in param_list:
-        result.append(param)     # param[1:]
-        result.append('')        # dist[1:]
-        result.append('')        # diff[1:]
-    result.append('')            # max_diff
-    result.append('')            # min_diff
-    df = pd.DataFrame([result])
-    file_path = os.path.join(RECORDS_DIR, timestamp,
-                             BK_FILE_MAP.get(bk_type) + '_' + mode + '.csv')
-    df.to_csv(file_path, mode='a', index=False, header=False)
+        result.extend((param, '', ''))                      # param[1:], dist[1:], diff[1:]
+    result.extend(('', ''))                                 # max_diff, min_diff
+    append_csv_row(result_csv_path(timestamp, bk_type, mode), result)
 
     return ori_min_dist
 
@@ -85,28 +73,17 @@ def eval_stage_2(ind: Scenario, timestamp: str, param_list: List[Any], bk_type:
         dist.append(follow_min_dist)
 
     # write the result to csv file
-    result = list()
-    result.append(f'Generation:{ind.gid}')
-    result.append(f'Individual:{ind.sid}')
-    param_list_copy = deepcopy(param_list)
-    # list alignment
-    if bk_type == 'RadiusBroker':
-        param_list_copy.insert(0, float('inf'))
-    else:
-        param_list_copy.insert(0, 0)
-    diffs = [round((d-dist[0]), 2) for d in dist]
+    result = [f'Generation:{ind.gid}', f'Individual:{ind.sid}']
+    # list alignment, the source scenario has no imperfection
+    param_list_copy = [float('inf') if bk_type == 'RadiusBroker' else 0, *param_list]
+    d0 = dist[0]
+    diffs = [round(d - d0, 2) for d in dist]
     # get the maximum difference between the follow-ups and the source
     max_diff = round(max(diffs[1:]), 2)       # exclude the diff[0]
     min_diff = round(min(diffs[1:]), 2)       # exclude the diff[0]
-    for pr, d in zip(param_list_copy, dist):
-        result.append(pr)                     # param[0:]
-        result.append(d)                      # dist[0:]
-        result.append(round((d-dist[0]),2))   # diff[0:]
-    result.append(max_diff)                   # max_diff
-    result.append(min_diff)                   # min_diff
-    df = pd.DataFrame([result])
-    file_path = os.path.join(RECORDS_DIR, timestamp,
-                             BK_FILE_MAP.get(bk_type) + '_' + mode + '.csv')
-    df.to_csv(file_path, mode='a', index=False, header=False)
+    for pr, d, diff in zip(param_list_copy, dist, diffs):
+        result.extend((pr, d, diff))          # param[0:], dist[0:], diff[0:]
+    result.extend((max_diff, min_diff))       # max_diff, min_diff
+    append_csv_row(result_csv_path(timestamp, bk_type, mode), result)
 
     return dist[0], min(dist[1:]), max_diff, min_diff
@@ -1,4 +1,4 @@
-from random import randint, random, shuffle
+from random import randint, random
 from scenario import Scenario
 from scenario.ad_agents import ADAgent, ADSection
 from scenario.pd_agents import PDAgent, PDSection
@@ -7,6 +7,9 @@ from config import MAX_ADC_COUNT, MAX_PD_COUNT, HD_MAP
 from hdmap.parser import MapParser
 from typing import List, Tuple
 
+# number of random ADCs tried before an add mutation gives up
+_MAX_ADD_TRIALS = 32
+
 def mut_ad_section(ind: ADSection) -> ADSection:
     """
     mutate the ad section of the individual
@@ -16,38 +19,35 @@ def mut_ad_section(ind: ADSection) -> ADSection:
     :rtype: ADSection
     """
     mut_pb = random()
+    adcs = ind.adcs
+    n = len(adcs)
     # remove a random adc with 10% probability
-    if mut_pb < 0.1 and len(ind.adcs) > 2:
-        shuffle(ind.adcs)
-        ind.adcs.pop()
+    if mut_pb < 0.1 and n > 2:
+        adcs.pop(randint(0, n - 1))
         ind.adjust_time()
         return ind
 
     # add a random adc with 30% probability
-    trial = 0
-    if mut_pb < 0.4 and len(ind.adcs) < MAX_ADC_COUNT:
-        while True:
+    if mut_pb < 0.4 and n < MAX_ADC_COUNT:
+        # give up after a bounded number of trials, the section is left unchanged
+        for trial in range(_MAX_ADD_TRIALS):
             new_ad = ADAgent.get_one(trial < 15)
             if ind.has_conflict(new_ad) and ind.add_agent(new_ad):
                 break
             elif trial > 15 and ind.add_agent(new_ad):
                 break
-            trial += 1
         ind.adjust_time()
         return ind
 
     # mutate a random agent
-    index = randint(0, len(ind.adcs) - 1)
-    routing = ind.adcs[index].routing
-    original_adc = ind.adcs.pop(index)
-    mut_counter = 0
-    while True:
+    index = randint(0, n - 1)
+    routing = adcs[index].routing
+    original_adc = adcs.pop(index)
+    for _ in range(5):
         if ind.add_agent(ADAgent.get_one_for_routing(routing)):
             break
-        mut_counter += 1
-        if mut_counter == 5:
-            ind.add_agent(original_adc)
-            break
+    else:
+        ind.add_agent(original_adc)
     ind.adjust_time()
     return ind
 
@@ -59,26 +59,27 @@ def mut_pd_section(ind: PDSection) -> PDSection:
     :returns: the mutated pd section of the individual
     :rtype: PDSection
     """
-    if len(ind.pds) == 0:
+    pds = ind.pds
+    n = len(pds)
+    if n == 0:
         # if there is no pd, add a random pd
         ind.add_agent(PDAgent.get_one())
         return ind
 
     mut_pb = random()
     # remove a random pd with 20% probability
-    if mut_pb < 0.2 and len(ind.pds) > 0:
-        shuffle(ind.pds)
-        ind.pds.pop()
+    if mut_pb < 0.2:
+        pds.pop(randint(0, n - 1))
         return ind
 
     # add a random pd with 20% probability
-    if mut_pb < 0.4 and len(ind.pds) <= MAX_PD_COUNT:
-        ind.pds.append(PDAgent.get_one())
+    if mut_pb < 0.4 and n <= MAX_PD_COUNT:
+        pds.append(PDAgent.get_one())
         return ind
 
     # mutate a random pd with 60% probability
-    index = randint(0, len(ind.pds) - 1)
-    ind.pds[index] = PDAgent.get_one_for_cw(ind.pds[index].cw_id)
+    index = randint(0, n - 1)
+    pds[index] = PDAgent.get_one_for_cw(pds[index].cw_id)
     return ind
 
 def mut_tl(ind: TrafficSection) -> TrafficSection:
@@ -90,24 +91,17 @@ def mut_tl(ind: TrafficSection) -> TrafficSection:
     :rtype: TrafficSection
     """
     mp = MapParser.get_instance(HD_MAP)
-    signals = list(mp.get_signals())
+    signals = mp.get_signal_set()
     # randomly select a signal light for mutation
     index = randint(0, len(ind.tls) - 1)
     original_tl = ind.tls.pop(index)
     mut_id = original_tl.tid
     # collect the equivalent and conflicting signal light ids
-    eq_list: List[str] = list()
-    for sig in original_tl.get_eq():
-        if sig in signals:
-            eq_list.append(sig)
-    ne_list: List[str] = list()
-    for sig in original_tl.get_ne():
-        if sig in signals:
-            ne_list.append(sig)
+    eq_list: List[str] = [sig for sig in original_tl.get_eq() if sig in signals]
+    ne_list: List[str] = [sig for sig in original_tl.get_ne() if sig in signals]
     # remove the equivalent and conflicting signal lights
-    for tl_config in ind.tls:
-        if tl_config.tid in eq_list or tl_config.tid in ne_list:
-            ind.tls.remove(tl_config)
+    banned = set(eq_list).union(ne_list)
+    ind.tls[:] = [tl_config for tl_config in ind.tls if tl_config.tid not in banned]
     # replace original_tl
     new_tl = TLConfig.get_one(mut_id)
     ind.tls.append(new_tl)
@@ -131,7 +125,7 @@ def mut_tl_section(ind: TrafficSection) -> TrafficSection:
         # mutate the traffic section of the individual twice with 30% probability
         mut_tl(ind)
         mut_tl(ind)
-    if mut_pb < 0.6:
+    elif mut_pb < 0.6:
         # mutate the traffic section of the individual once with 30% probability
         mut_tl(ind)
     # do not mutate with 40% probability
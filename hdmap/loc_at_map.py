@@ -1,9 +1,11 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+import numpy as np
 from hdmap.parser import MapParser
 from apollo.utils import PositionEstimate
 from modules.localization.proto.localization_pb2 import LocalizationEstimate
 from shapely.geometry import Point
 from config import HD_MAP
-from shapely.geometry import LineString
 
 def loc_to_pos(loc: LocalizationEstimate) -> PositionEstimate:
     """
@@ -16,35 +18,45 @@ def loc_to_pos(loc: LocalizationEstimate) -> PositionEstimate:
     """
     if loc is None:
         return PositionEstimate(lane_id=None, s=None)
-    point = Point(loc.pose.position.x, loc.pose.position.y)
-    mp = MapParser.get_instance(HD_MAP)
-    lane_ids = mp.get_lanes()                        # List[lane_ids]
-    rt_pos = PositionEstimate(lane_id=None, s=None)  # the value to be returned
-    min_dist = float('inf')
-    for lane_id in lane_ids:
-        # traverse each lane, find the closest lane
-        central_line = mp.get_lane_central_curve(lane_id)
-        distance = central_line.distance(point)
-        if distance < min_dist:
-            min_dist = distance
-            rt_pos.lane_id = lane_id
-    if lane_id is None:
-        return rt_pos
-    # get the closest lane central line
-    lane_central_line = mp.get_lane_central_curve(rt_pos.lane_id)
-    segments = list(map(LineString, zip(lane_central_line.coords[:-1], lane_central_line.coords[1:])))
-    sorted_segments = sorted(segments, key=lambda x: point.distance(x))
-    closest_segment = sorted_segments[0]
-    pos = segments.index(closest_segment)
-    # find the position in segments
-    s = 0
-    for i in range(pos):
-        # accumulate the length of the previous segments
-        s += segments[i].length
-    # accumulate the length of the current segment
-    cur_seg_start = Point(segments[pos].coords[0])
-    # find the start point of the current segment
-    s += cur_seg_start.distance(point)
-    # accumulate the length of the current segment
-    rt_pos.s = round(s, 1)
-    return rt_pos
+    lane_id, s = _pos_at(loc.pose.position.x, loc.pose.position.y)
+    return PositionEstimate(lane_id=lane_id, s=s)
+
+@lru_cache(maxsize=None)
+def _map_parser() -> MapParser:
+    """
+    Get the parser of the HD map in use, resolved once on first use
+
+    :returns: MapParser instance
+    :rtype: MapParser
+    """
+    return MapParser.get_instance(HD_MAP)
+
+@lru_cache(maxsize=256)
+def _pos_at(x: float, y: float) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Find the closest lane of a point and how far along the lane it is, results are cached
+    so an ADC that has not moved since the last localization is resolved at no cost
+
+    :param float x: x coordinate of the point
+    :param float y: y coordinate of the point
+    :returns: ID of the closest lane and the position on it
+    :rtype: Tuple[Optional[str], Optional[float]]
+    """
+    mp = _map_parser()
+    # find the closest lane through the spatial index of lane central curves
+    tree, lane_ids = mp.get_lane_index()
+    nearest = tree.nearest(Point(x, y))
+    if nearest is None:
+        return None, None
+    lane_id = lane_ids[int(nearest)]
+    # segments of the closest lane central line
+    starts, deltas, seg_len2, before = mp.get_lane_segments(lane_id)
+    p = np.array([x, y])
+    # distance from the point to every segment, by projecting it onto the segment
+    t = np.divide(((p - starts) * deltas).sum(axis=1), seg_len2,
+                  out=np.zeros_like(seg_len2), where=seg_len2 > 0)
+    proj = starts + np.clip(t, 0.0, 1.0)[:, None] * deltas
+    pos = int(np.argmin(np.hypot(*(proj - p).T)))
+    # length of the previous segments plus the distance from the start point of the current segment
+    s = float(before[pos]) + float(np.hypot(*(p - starts[pos])))
+    return lane_id, round(s, 1)
@@ -2,9 +2,11 @@ import math
 import pickle
 from collections import defaultdict
 from pathlib import Path
-from typing import List, Set, Tuple, Dict, Any
+from typing import FrozenSet, List, Optional, Set, Tuple, Dict, Any
 import networkx as nx
+import numpy as np
 from shapely.geometry import LineString, Point
+from shapely.strtree import STRtree
 from config import MT_ROOT
 from hdmap import load_hd_map
 from modules.common.proto.geometry_pb2 import PointENU
@@ -33,6 +35,12 @@ class MapParser:
     __lanes_controlled_by_signal: dict
     __signal_relations: nx.Graph
     __lane_nx: nx.DiGraph
+    __lane_index: Optional[Tuple[STRtree, List[str]]] = None
+    __central_curves: Optional[Dict[str, LineString]] = None
+    __signal_set: Optional[FrozenSet[str]] = None
+    __lanes_intersect: Optional[Dict[Tuple[str, str], bool]] = None
+    __signals_wrt: Optional[Dict[str, Tuple[Tuple[str, str], ...]]] = None
+    __lane_segments: Optional[Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]] = None
     __instance: Dict[str, 'MapParser'] = dict()
 
     def __init__(self, filename: str) -> None:
@@ -58,14 +66,15 @@ class MapParser:
         returns: MapParse instance
         rtype: MapParser
         """
+        # already loaded, skip the checks on the file system
+        if map_name in MapParser.__instance:
+            return MapParser.__instance[map_name]
         map_dir = Path(MT_ROOT, 'hdmap', 'maps')
         assert map_name in list(x.name for x in map_dir.iterdir()), f'map {map_name} does not exist'
         map_file = Path(map_dir, map_name, 'base_map.bin')
         map_pickle = Path(map_file.parent, 'map.pickle')
         assert map_file.exists(), f'HD map {map_name} does not exist!'
-        if map_name in MapParser.__instance:
-            return MapParser.__instance[map_name]
-        elif map_pickle.exists():
+        if map_pickle.exists():
             with open(map_pickle, 'rb') as fp:
                 instance = pickle.load(fp)
                 MapParser.__instance[map_name] = instance
@@ -218,10 +227,15 @@ class MapParser:
           indicates ``signal_5`` should have the same color, ``signal_6`` 
           cannot be green if the signal passed in is green.
         """
-        result = list()
-        for u, v, data in self.__signal_relations.edges(signal_id, data=True):
-            result.append((v, data['v']))
-        return result
+        # the relations never change once the map is loaded, each signal is only looked up once
+        if self.__signals_wrt is None:
+            self.__signals_wrt = dict()
+        relevant = self.__signals_wrt.get(signal_id)
+        if relevant is None:
+            relevant = tuple((v, data['v']) for u, v, data
+                             in self.__signal_relations.edges(signal_id, data=True))
+            self.__signals_wrt[signal_id] = relevant
+        return list(relevant)
 
     def is_conflict_lanes(self, lane_id1: List[str], lane_id2: List[str]) -> bool:
         """
@@ -233,13 +247,22 @@ class MapParser:
             False otherwise.
         :rtype: bool
         """
+        # whether two lanes intersect is remembered, the same pairs are checked
+        # over and over while generating and evolving scenarios
+        if self.__lanes_intersect is None:
+            self.__lanes_intersect = dict()
+        cache = self.__lanes_intersect
         for lid1 in lane_id1:
             for lid2 in lane_id2:
                 if lid1 == lid2:
                     continue
-                lane1 = self.get_lane_central_curve(lid1)
-                lane2 = self.get_lane_central_curve(lid2)
-                if lane1.intersects(lane2):
+                key = (lid1, lid2) if lid1 < lid2 else (lid2, lid1)
+                intersects = cache.get(key)
+                if intersects is None:
+                    lane1 = self.get_lane_central_curve(lid1)
+                    lane2 = self.get_lane_central_curve(lid2)
+                    intersects = cache[key] = lane1.intersects(lane2)
+                if intersects:
                     return True
         return False
 
@@ -251,11 +274,50 @@ class MapParser:
         :returns: an object representing the lane's central curve
         :rypte: LineString
         """
-        lane = self.__lanes[lane_id]
-        points = lane.central_curve.segment[0].line_segment
-        line = LineString([[x.x, x.y] for x in points.point])
+        # the map does not change at runtime, build each curve only once
+        if self.__central_curves is None:
+            self.__central_curves = dict()
+        line = self.__central_curves.get(lane_id)
+        if line is None:
+            lane = self.__lanes[lane_id]
+            points = lane.central_curve.segment[0].line_segment
+            line = LineString([[x.x, x.y] for x in points.point])
+            self.__central_curves[lane_id] = line
         return line
 
+    def get_lane_index(self) -> Tuple[STRtree, List[str]]:
+        """
+        Gets a spatial index over the central curves of all lanes, built on first use
+
+        :returns: the index and the lane ID of each indexed curve
+        :rtype: Tuple[STRtree, List[str]]
+        """
+        if self.__lane_index is None:
+            lane_ids = self.get_lanes()
+            tree = STRtree([self.get_lane_central_curve(x) for x in lane_ids])
+            self.__lane_index = (tree, lane_ids)
+        return self.__lane_index
+
+    def get_lane_segments(self, lane_id: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the segments of the lane's central curve as arrays, computed once per lane
+
+        :param str lane_id: ID of the lane interested in
+        :returns: (S, 2) start points, (S, 2) start-to-end vectors, (S,) squared lengths,
+          and (S,) length of the curve before each segment
+        :rtype: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        """
+        if self.__lane_segments is None:
+            self.__lane_segments = dict()
+        if lane_id not in self.__lane_segments:
+            coords = np.asarray(self.get_lane_central_curve(lane_id).coords)
+            starts = coords[:-1]
+            deltas = coords[1:] - starts
+            len2 = (deltas * deltas).sum(axis=1)
+            before = np.concatenate(([0.0], np.cumsum(np.sqrt(len2))[:-1]))
+            self.__lane_segments[lane_id] = (starts, deltas, len2, before)
+        return self.__lane_segments[lane_id]
+
     def get_lane_length(self, lane_id: str) -> float:
         """
         Gets the length of the lane.
@@ -359,6 +421,17 @@ class MapParser:
         """
         return list(self.__signals.keys())
 
+    def get_signal_set(self) -> FrozenSet[str]:
+        """
+        Get all signal IDs on the HD Map as a set, for fast membership tests
+
+        :returns: set of signal IDs
+        :rtype: FrozenSet[str]
+        """
+        if self.__signal_set is None:
+            self.__signal_set = frozenset(self.__signals.keys())
+        return self.__signal_set
+
     def get_signal_by_id(self, s_id: str) -> Signal:
         """
         Get a specific signal object based on ID
@@ -33,6 +33,17 @@ def run_cmd(cmd, check=True, capture=False):
             sys.exit(1)
         return e.returncode, None, None
 
+def run_script(script, check=True):
+    """Run several commands in a single bash shell, stopping at the first failing step"""
+    try:
+        result = subprocess.run(["bash", "-c", "set -euo pipefail\n" + script], check=check)
+        return result.returncode, None, None
+    except subprocess.CalledProcessError as e:
+        if check:
+            log_error(f"Script failed: {script}")
+            sys.exit(1)
+        return e.returncode, None, None
+
 def check_cmd(cmd) -> bool:
     """Check if a command exists"""
     return shutil.which(cmd) is not None
@@ -60,28 +71,27 @@ def install_dependency(dependency: str):
     if dependency == 'docker':
         log_info("Adding Docker official repository...")
         # Install necessary packages
-        run_cmd("sudo apt-get update")
-        run_cmd("sudo apt-get install -y ca-certificates curl gnupg lsb-release")
+        run_script("""
+sudo apt-get update
+sudo apt-get install -y ca-certificates curl gnupg lsb-release
+sudo mkdir -p /etc/apt/keyrings
+""")
         
-        # Add Docker's official GPG key
-        run_cmd("sudo mkdir -p /etc/apt/keyrings")
-        
-        # Try to download GPG key with error handling
-        gpg_result = run_cmd("curl -fsSL https://download.docker.com/linux/ubuntu/gpg | sudo gpg --dearmor -o /etc/apt/keyrings/docker.gpg", check=False)
+        # Add Docker's official GPG key, with error handling
+        gpg_result = run_script("curl -fsSL https://download.docker.com/linux/ubuntu/gpg | sudo gpg --dearmor -o /etc/apt/keyrings/docker.gpg", check=False)
         if gpg_result[0] != 0:
             log_error("Failed to download Docker GPG key. Please check your internet connection.")
             sys.exit(1)
         
-        # Set Docker repository
-        run_cmd('echo "deb [arch=$(dpkg --print-architecture) signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/ubuntu $(lsb_release -cs) stable" | sudo tee /etc/apt/sources.list.d/docker.list > /dev/null')
-        
-        # Install Docker
-        run_cmd("sudo apt-get update")
-        run_cmd("sudo apt-get install -y docker-ce docker-ce-cli containerd.io docker-buildx-plugin docker-compose-plugin")
-        
-        run_cmd("sudo systemctl start docker")
-        run_cmd("sudo systemctl enable docker")
-        run_cmd(f"sudo usermod -aG docker {os.getenv('USER')}")
+        # Set Docker repository and install Docker
+        run_script(f"""
+echo "deb [arch=$(dpkg --print-architecture) signed-by=/etc/apt/keyrings/docker.gpg] https://download.docker.com/linux/ubuntu $(lsb_release -cs) stable" | sudo tee /etc/apt/sources.list.d/docker.list > /dev/null
+sudo apt-get update
+sudo apt-get install -y docker-ce docker-ce-cli containerd.io docker-buildx-plugin docker-compose-plugin
+sudo systemctl start docker
+sudo systemctl enable docker
+sudo usermod -aG docker {os.getenv('USER')}
+""")
         
         log_error("Docker installed. Please restart the host machine for docker daemon service to take effect. Then re-run install_apollo.py")
         sys.exit(1)
@@ -91,18 +101,17 @@ def install_dependency(dependency: str):
     elif dependency == 'nvidia-container-toolkit':
         log_info("Installing NVIDIA Container Toolkit...")
         
-        # Add NVIDIA repository
-        run_cmd("distribution=$(. /etc/os-release;echo $ID$VERSION_ID)")
-        run_cmd("curl -fsSL https://nvidia.github.io/libnvidia-container/gpgkey | sudo gpg --dearmor -o /usr/share/keyrings/nvidia-container-toolkit-keyring.gpg")
-        run_cmd("curl -s -L https://nvidia.github.io/libnvidia-container/$distribution/libnvidia-container.list | sed 's#deb https://#deb [signed-by=/usr/share/keyrings/nvidia-container-toolkit-keyring.gpg] https://#g' | sudo tee /etc/apt/sources.list.d/nvidia-container-toolkit.list")
-        
-        # Install NVIDIA Container Toolkit
-        run_cmd("sudo apt-get update")
-        run_cmd("sudo apt-get install -y nvidia-container-toolkit")
-        
-        # Configure Docker to use NVIDIA Container Runtime
-        run_cmd("sudo nvidia-ctk runtime configure --runtime=docker")
-        run_cmd("sudo systemctl restart docker")
+        # Add NVIDIA repository, $distribution must be set in the same shell that uses it
+        # then install NVIDIA Container Toolkit and configure Docker to use NVIDIA Container Runtime
+        run_script("""
+distribution=$(. /etc/os-release;echo $ID$VERSION_ID)
+curl -fsSL https://nvidia.github.io/libnvidia-container/gpgkey | sudo gpg --dearmor -o /usr/share/keyrings/nvidia-container-toolkit-keyring.gpg
+curl -s -L https://nvidia.github.io/libnvidia-container/$distribution/libnvidia-container.list | sed 's#deb https://#deb [signed-by=/usr/share/keyrings/nvidia-container-toolkit-keyring.gpg] https://#g' | sudo tee /etc/apt/sources.list.d/nvidia-container-toolkit.list
+sudo apt-get update
+sudo apt-get install -y nvidia-container-toolkit
+sudo nvidia-ctk runtime configure --runtime=docker
+sudo systemctl restart docker
+""")
         
         log_success("NVIDIA Container Toolkit installed and configured successfully")
 
@@ -1,18 +1,13 @@
 import os
-import csv
 from datetime import datetime
 from broker.factory import BrokerFactory
-from apollo.container import ApolloContainer
+from apollo.container import ApolloContainer, start_containers
 from scenario import Scenario
 from scenario.scenario_runner import ScenarioRunner
 from hdmap.parser import MapParser
 from genetic.evaluate import eval_stage_2
 from config import (APOLLO_ROOT, HD_MAP, MAX_ADC_COUNT, RECORDS_DIR, RUN_FOR_HOUR, BK_PARAM_MAP)
-from utils import BK_FILE_MAP, BK_HEAD_MAP
-
-# [Warning] Please do not modify this file's name,
-# coz we've used inspect.stack() to determine which entrance is calling
-# Although it's not a good practice, we just do not want to use so many parameters in the functions
+from utils import append_csv_row, result_csv_header, result_csv_path
 
 def main_random(bk_type: str):
     """
@@ -24,10 +19,7 @@ def main_random(bk_type: str):
     bkf = BrokerFactory()
     containers = [
         ApolloContainer(APOLLO_ROOT, f'ROUTE_{x}') for x in range(MAX_ADC_COUNT)]
-    for ctn in containers:
-        ctn.start_instance()
-        ctn.start_dreamview()
-        print(f'Dreamview at http://{ctn.ip}:{ctn.port}')
+    start_containers(containers)
     srunner = ScenarioRunner(containers)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
@@ -36,16 +28,8 @@ def main_random(bk_type: str):
     # write the header of csv file
     if not os.path.exists(os.path.join(RECORDS_DIR, timestamp)):
         os.makedirs(os.path.join(RECORDS_DIR, timestamp))
-    file_path = os.path.join(RECORDS_DIR, timestamp,
-                             BK_FILE_MAP.get(bk_type) + '_' + 'random' + '.csv')
-    with open(file_path, 'w') as f:
-        writer = csv.writer(f)
-        header = ['Generation', 'Individual']
-        for i in range(len(param_list) + 1):
-            header.extend([f'{BK_HEAD_MAP.get(bk_type)}_{i}', f'dist_{i}', f'diff_{i}'])
-        header.append('max_diff')
-        header.append('min_diff')
-        writer.writerow(header)
+    # the rows appended by the evaluation use the same writer and line endings
+    append_csv_row(result_csv_path(timestamp, bk_type, 'random'), result_csv_header(bk_type, param_list))
 
     # start the random testing cycle
     start_time = datetime.now()
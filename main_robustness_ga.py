@@ -1,23 +1,20 @@
 import os
-import csv
 from datetime import datetime
 from functools import partial
 from deap import algorithms, base, tools
 from broker.factory import BrokerFactory
-from apollo.container import ApolloContainer
+from apollo.container import ApolloContainer, start_containers
 from scenario import Scenario
+from scenario.fitness import RobustnessFitness
 from scenario.scenario_runner import ScenarioRunner
 from hdmap.parser import MapParser
+from genetic import tag_generation
 from genetic.crossover import cx_scenario
 from genetic.mutation import mut_scenario
 from genetic.evaluate import eval_stage_2
 from config import (APOLLO_ROOT, HD_MAP, MAX_ADC_COUNT, RECORDS_DIR,
                     RUN_FOR_HOUR, POP_SIZE, BK_PARAM_MAP)
-from utils import BK_FILE_MAP, BK_HEAD_MAP
-
-# [Warning] Please do not modify this file's name,
-# coz we've used inspect.stack() to determine which entrance is calling
-# Although it's not a good practice, we just do not want to use so many parameters in the functions
+from utils import append_csv_row, result_csv_header, result_csv_path
 
 def main_robustness(bk_type: str, cxpb: float, mutpb: float):
     """
@@ -32,15 +29,14 @@ def main_robustness(bk_type: str, cxpb: float, mutpb: float):
     :param float cxpb: the crossover probability
     :param float mutpb: the mutation probability
     """
+    # every individual created from now on is evaluated with RobustnessFitness
+    Scenario.fitness_class = RobustnessFitness
     mp = MapParser.get_instance(HD_MAP)
     bkf = BrokerFactory()
     containers = [
         ApolloContainer(APOLLO_ROOT, f'ROUTE_{x}') for x in range(MAX_ADC_COUNT)]
     # Initialize all apollo containers
-    for ctn in containers:
-        ctn.start_instance()
-        ctn.start_dreamview()
-        print(f'Dreamview at http://{ctn.ip}:{ctn.port}')
+    start_containers(containers)
     srunner = ScenarioRunner(containers)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
@@ -54,16 +50,8 @@ def main_robustness(bk_type: str, cxpb: float, mutpb: float):
     # write the header of csv file
     if not os.path.exists(os.path.join(RECORDS_DIR, timestamp)):
         os.makedirs(os.path.join(RECORDS_DIR, timestamp))
-    file_path = os.path.join(RECORDS_DIR, timestamp,
-                             BK_FILE_MAP.get(bk_type) + '_' + 'robustness' + '.csv')
-    with open(file_path, 'w') as f:
-        writer = csv.writer(f)
-        header = ['Generation', 'Individual']
-        for i in range(len(param_list) + 1):
-            header.extend([f'{BK_HEAD_MAP.get(bk_type)}_{i}', f'dist_{i}', f'diff_{i}'])
-        header.append('max_diff')
-        header.append('min_diff')
-        writer.writerow(header)
+    # the rows appended by the evaluation use the same writer and line endings
+    append_csv_row(result_csv_path(timestamp, bk_type, 'robustness'), result_csv_header(bk_type, param_list))
 
     # start the genetic algorithm cycle
     start_time = datetime.now()
@@ -73,12 +61,8 @@ def main_robustness(bk_type: str, cxpb: float, mutpb: float):
     # initialize population
     population = [Scenario.get_conflict_one() for _ in range(POP_SIZE)]
     curr_gen = 0
-    # initialize gid
-    for index, c in enumerate(population):
-        c.gid = curr_gen
-        c.sid = index
-
-    invalid_ind = [ind for ind in population if not ind.fitness.valid]
+    # initialize gid and sid
+    invalid_ind = tag_generation(population, curr_gen)
     fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
     for ind, fit in zip(invalid_ind, fitnesses):
         # direction 1: minimize min(dist[1:])
@@ -92,11 +76,7 @@ def main_robustness(bk_type: str, cxpb: float, mutpb: float):
         offspring = algorithms.varOr(population, toolbox, POP_SIZE, cxpb, mutpb)
 
         # update gid and sid in offspring
-        for index, c in enumerate(offspring):
-            c.gid = curr_gen
-            c.sid = index
-        
-        invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
+        invalid_ind = tag_generation(offspring, curr_gen)
         fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
         for ind, fit in zip(invalid_ind, fitnesses):
             # direction 1: minimize min(dist[1:])
@@ -1,23 +1,21 @@
 import os
-import csv
 from datetime import datetime
 from functools import partial
+import numpy as np
 from deap import algorithms, base, tools
 from broker.factory import BrokerFactory
-from apollo.container import ApolloContainer
+from apollo.container import ApolloContainer, start_containers
 from scenario import Scenario
+from scenario.fitness import SoundnessFitness
 from scenario.scenario_runner import ScenarioRunner
 from hdmap.parser import MapParser
+from genetic import tag_generation
 from genetic.crossover import cx_scenario
 from genetic.mutation import mut_scenario
 from genetic.evaluate import eval_stage_1, eval_stage_2
 from config import (APOLLO_ROOT, HD_MAP, MAX_ADC_COUNT, RECORDS_DIR, 
                     RUN_FOR_HOUR, POP_SIZE, STAGE1, BK_PARAM_MAP)
-from utils import BK_FILE_MAP, BK_HEAD_MAP
-
-# [Warning] Please do not modify this file's name,
-# coz we've used inspect.stack() to determine which entrance is calling
-# Although it's not a good practice, we just do not want to use so many parameters in the functions
+from utils import append_csv_row, result_csv_header, result_csv_path
 
 def main_soundness(bk_type: str, cxpb: float, mutpb: float):
     """
@@ -35,15 +33,14 @@ def main_soundness(bk_type: str, cxpb: float, mutpb: float):
     :param float cxpb: the crossover probability
     :param float mutpb: the mutation probability
     """
+    # every individual created from now on is evaluated with SoundnessFitness
+    Scenario.fitness_class = SoundnessFitness
     mp = MapParser.get_instance(HD_MAP)
     bkf = BrokerFactory()
     containers = [
         ApolloContainer(APOLLO_ROOT, f'ROUTE_{x}') for x in range(MAX_ADC_COUNT)]
     # Initialize all apollo containers
-    for ctn in containers:
-        ctn.start_instance()
-        ctn.start_dreamview()
-        print(f'Dreamview at http://{ctn.ip}:{ctn.port}')
+    start_containers(containers)
     srunner = ScenarioRunner(containers)
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
@@ -57,16 +54,8 @@ def main_soundness(bk_type: str, cxpb: float, mutpb: float):
     # write the header of csv file
     if not os.path.exists(os.path.join(RECORDS_DIR, timestamp)):
         os.makedirs(os.path.join(RECORDS_DIR, timestamp))
-    file_path = os.path.join(RECORDS_DIR, timestamp,
-                             BK_FILE_MAP.get(bk_type) + '_' + 'soundness' + '.csv')
-    with open(file_path, 'w') as f:
-        writer = csv.writer(f)
-        header = ['Generation', 'Individual']
-        for i in range(len(param_list) + 1):
-            header.extend([f'{BK_HEAD_MAP.get(bk_type)}_{i}', f'dist_{i}', f'diff_{i}'])
-        header.append('max_diff')
-        header.append('min_diff')
-        writer.writerow(header)
+    # the rows appended by the evaluation use the same writer and line endings
+    append_csv_row(result_csv_path(timestamp, bk_type, 'soundness'), result_csv_header(bk_type, param_list))
 
     # start the genetic algorithm cycle
     start_time = datetime.now()
@@ -76,12 +65,8 @@ def main_soundness(bk_type: str, cxpb: float, mutpb: float):
     # initialize population
     population = [Scenario.get_conflict_one() for _ in range(POP_SIZE)]
     curr_gen = 0
-    # initialize sid
-    for index, c in enumerate(population):
-        c.gid = curr_gen
-        c.sid = index
-
-    invalid_ind = [ind for ind in population if not ind.fitness.valid]
+    # initialize gid and sid
+    invalid_ind = tag_generation(population, curr_gen)
     fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
     for ind, fit in zip(invalid_ind, fitnesses):
         # the first direction is the min_dist of source scenario
@@ -95,11 +80,7 @@ def main_soundness(bk_type: str, cxpb: float, mutpb: float):
         offspring = algorithms.varOr(population, toolbox, POP_SIZE, cxpb, mutpb)
 
         # update gid and sid in offspring
-        for index, c in enumerate(offspring):
-            c.gid = curr_gen
-            c.sid = index
-
-        invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
+        invalid_ind = tag_generation(offspring, curr_gen)
         fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
         for ind, fit in zip(invalid_ind, fitnesses):
             ind.fitness.values = (fit, 0)
@@ -110,11 +91,12 @@ def main_soundness(bk_type: str, cxpb: float, mutpb: float):
         population[:] = toolbox.select(population + offspring, POP_SIZE)
 
         # check if the population is convergent
-        pop_fit = [ind.fitness.values[0] for ind in population]
-        # ascending order
-        pop_fit.sort()
+        pop_fit = np.fromiter((ind.fitness.values[0] for ind in population),
+                              dtype=np.float64, count=len(population))
+        # only the 80th percentile is needed, partial selection instead of a full sort
+        k = int(POP_SIZE * 0.8)
         # 80% of the population min_dist should be less than 5 -> convergent
-        if pop_fit[int(POP_SIZE * 0.8)] < 5:
+        if np.partition(pop_fit, k)[k] < 5:
             break
 
     # stage 2
@@ -127,11 +109,7 @@ def main_soundness(bk_type: str, cxpb: float, mutpb: float):
         offspring = algorithms.varOr(population, toolbox, POP_SIZE, cxpb, mutpb)
 
         # update gid and sid in offspring
-        for index, c in enumerate(offspring):
-            c.gid = curr_gen
-            c.sid = index
-
-        invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
+        invalid_ind = tag_generation(offspring, curr_gen)
         fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
         for ind, fit in zip(invalid_ind, fitnesses):
             # direction 1: minimize dist[0]
@@ -15,16 +15,12 @@ def execute_command_in_docker(container_name: str, command: str):
         # build the docker exec command, -d option using detached mode
         docker_command = ['docker', 'exec', '-d', container_name, 'bash', '-c', command]
         
-        # execute the command and get the output
-        result = subprocess.run(docker_command, capture_output=True, text=True, check=True)
-        
-        # print the execution result
-        if result.returncode == 0:
-            print(f"Command executed successfully. Using detached mode, no output will be printed.")
-        else:
-            print(f"Command executed failed: {result.stderr}")
+        # detached mode produces no output, only keep stderr to report failures
+        subprocess.run(docker_command, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.PIPE, check=True)
+        print(f"Command executed successfully. Using detached mode, no output will be printed.")
     except subprocess.CalledProcessError as e:
-        print(f"Error executing command: {e.stderr}")
+        print(f"Error executing command: {e.stderr.decode(errors='replace')}")
 
 def main():
 
@@ -37,8 +33,14 @@ def main():
     # make sure the source file exists
     if not os.path.isfile(file_path):
         raise FileNotFoundError(f"Source file not found: {file_path}")
-    # copy the record file to the Apollo root directory
-    shutil.copy(file_path, dest_path)
+    # link the record file into the Apollo root directory, copy it only when it lives on another filesystem
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.link(file_path, dest_path)
+    except OSError:
+        # copyfile uses sendfile on linux, the content never goes through python
+        shutil.copyfile(file_path, dest_path)
 
     # initialize the container, create a new container with the TEST route name
     container = ApolloContainer(APOLLO_ROOT, 'ROUTE_TEST')
@@ -1,14 +1,25 @@
 import os
 import json
-from dataclasses import asdict, dataclass
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import ClassVar, Optional, Type
 from deap.base import Fitness
-from config import HD_MAP
 from scenario.ad_agents import ADAgent, ADSection
 from scenario.pd_agents import PDAgent, PDSection
 from scenario.traffic_light import TrafficSection
-from scenario.fitness import SoundnessFitness, RobustnessFitness
-from hdmap.parser import MapParser
-import inspect
+
+try:
+    # orjson parses and encodes bytes directly and is several times faster than the standard library
+    from orjson import OPT_INDENT_2, dumps as _orjson_dumps, loads as _json_loads
+
+    def _json_dumps(obj) -> bytes:
+        return _orjson_dumps(obj, option=OPT_INDENT_2)
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        # same layout as orjson, so the scenario files do not depend on what is installed
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
 
 @dataclass
 class Scenario:
@@ -32,6 +43,8 @@ class Scenario:
     gid: int = -1
     sid: int = -1
     fid: int = -1
+    # fitness of every new individual, set by the GA entry script before creating the population
+    fitness_class: ClassVar[Optional[Type[Fitness]]] = None
 
     def __post_init__(self):
         """
@@ -42,21 +55,38 @@ class Scenario:
         :main_robustness_ga.py: RobustnessFitness;
         :other scripts: None;
         """
-        self.fitness: Fitness = None       # default to None
-        stack = inspect.stack()
-        try:
-            for frame in stack:
-                if frame.filename.endswith(('main_soundness_ga.py', 'main_robustness_ga.py')):
-                    script_name = os.path.basename(frame.filename)
-                    if script_name == 'main_soundness_ga.py':
-                        self.fitness: Fitness = SoundnessFitness()
-                    elif script_name == 'main_robustness_ga.py':
-                        self.fitness: Fitness = RobustnessFitness()
-                    break
-        except Exception as e:
-            print(f'Error in __post_init__: {e}')
-        finally:
-            del stack
+        fitness_class = Scenario.fitness_class
+        self.fitness: Fitness = None if fitness_class is None else fitness_class()
+
+    def fingerprint(self) -> tuple:
+        """
+        Gets a hashable summary of the chromosome, two scenarios with the same
+          fingerprint describe the same test case regardless of gid, sid and fid
+
+        :returns: fingerprint of the scenario
+        :rtype: tuple
+        """
+        return (
+            tuple((tuple(a.routing), a.start_s, a.dest_s, a.start_t) for a in self.ad_section.adcs),
+            tuple((p.cw_id, p.speed, p.start_t) for p in self.pd_section.pds),
+            tuple((tl.tid, tuple(tl.duration), tl.delta_t, tl.confidence) for tl in self.tl_section.tls)
+        )
+
+    def clone(self) -> 'Scenario':
+        """
+        Copy the chromosome section by section together with its ids and fitness,
+          this is what ``toolbox.clone`` and the Pareto front use through ``copy.deepcopy``
+
+        :returns: a copy of this scenario
+        :rtype: Scenario
+        """
+        result = Scenario(self.ad_section.clone(), self.pd_section.clone(),
+                          self.tl_section.clone(), self.gid, self.sid, self.fid)
+        result.fitness = None if self.fitness is None else deepcopy(self.fitness)
+        return result
+
+    def __deepcopy__(self, memo) -> 'Scenario':
+        return self.clone()
 
     def to_dict(self) -> dict:
         """
@@ -66,9 +96,9 @@ class Scenario:
         :rtype: dict
         """
         return {
-            'ad_section': asdict(self.ad_section),
-            'pd_section': asdict(self.pd_section),
-            'tl_section': asdict(self.tl_section)
+            'ad_section': self.ad_section.to_dict(),
+            'pd_section': self.pd_section.to_dict(),
+            'tl_section': self.tl_section.to_dict()
         }
 
     def to_json(self, file_path: str, name: str) -> bool:
@@ -82,8 +112,9 @@ class Scenario:
         """
         dict_data = self.to_dict()
         dest_file = os.path.join(file_path, f'{name}.json')
-        with open(dest_file, 'w') as fp:
-            json.dump(dict_data, fp, indent=4)
+        with open(dest_file, 'wb') as fp:
+            # one write of the encoded document instead of one per token
+            fp.write(_json_dumps(dict_data))
         return True
 
     @staticmethod
@@ -95,8 +126,8 @@ class Scenario:
         :returns: Scenario instance
         :rtype: Scenario
         """
-        with open(json_file_path, 'r') as fp:
-            data = json.loads(fp.read())
+        with open(json_file_path, 'rb') as fp:
+            data = _json_loads(fp.read())
             ad_section = data['ad_section']
             r_ad = ADSection([])
             for adc in ad_section['adcs']:
@@ -140,14 +171,13 @@ class Scenario:
         :returns: randomly generated scenario with conflict
         :rtype: Scenario
         """
-        while True:
-            result = Scenario(
-                ad_section=ADSection.get_one(),
-                pd_section=PDSection.get_one(),
-                tl_section=TrafficSection.generate_config()
-            )
-            if result.has_ad_conflict() > 0:
-                return result
+        # only the ADS section decides whether there is a conflict,
+        # the other sections are generated once it has been found
+        return Scenario(
+            ad_section=ADSection.get_conflict_one(),
+            pd_section=PDSection.get_one(),
+            tl_section=TrafficSection.generate_config()
+        )
 
     @staticmethod
     def get_conflict_one_only_adc() -> 'Scenario':
@@ -159,28 +189,8 @@ class Scenario:
         :returns: randomly generated scenario with conflict without PDs
         :rtype: Scenario
         """
-        while True:
-            result = Scenario(
-                ad_section=ADSection.get_one(),
-                pd_section=PDSection([]),
-                tc_section=TrafficSection.generate_config()
-            )
-            if result.has_ad_conflict() > 0:
-                return result
-
-    def has_ad_conflict(self) -> int:
-        """
-        Check number of ADS instance pairs with conflict
-
-        :returns: number of conflicts
-        :rtype: int
-        """
-        ma = MapParser.get_instance(HD_MAP)
-        conflict = set()
-        for ad in self.ad_section.adcs:
-            for bd in self.ad_section.adcs:
-                if ad.routing == bd.routing:
-                    continue
-                if ma.is_conflict_lanes(ad.routing, bd.routing):
-                    conflict.add(frozenset([ad.routing_str, bd.routing_str]))
-        return len(conflict)
+        return Scenario(
+            ad_section=ADSection.get_conflict_one(),
+            pd_section=PDSection([]),
+            tl_section=TrafficSection.generate_config()
+        )
@@ -6,7 +6,7 @@ from apollo.utils import PositionEstimate
 from config import HD_MAP, INSTANCE_MAX_WAIT_TIME, MAX_ADC_COUNT
 from hdmap.parser import MapParser
 
-@dataclass
+@dataclass(slots=True)
 class ADAgent:
     """
     Genetic representation of a single ADS instance
@@ -63,6 +63,33 @@ class ADAgent:
         """
         return '->'.join(self.routing)
 
+    def to_dict(self) -> dict:
+        """
+        Converts the ADS instance representation to dict
+
+        :returns: ADS instance representation in JSON format
+        :rtype: dict
+        """
+        return {
+            'routing': list(self.routing),
+            'start_s': self.start_s,
+            'dest_s': self.dest_s,
+            'start_t': self.start_t
+        }
+
+    def clone(self) -> 'ADAgent':
+        """
+        Copy the ADS instance representation field by field, much cheaper
+          than going through ``copy.deepcopy``
+
+        :returns: a copy of this ADS instance representation
+        :rtype: ADAgent
+        """
+        return ADAgent(list(self.routing), self.start_s, self.dest_s, self.start_t)
+
+    def __deepcopy__(self, memo) -> 'ADAgent':
+        return self.clone()
+
     @staticmethod
     def get_one(must_start_from_junction: bool=True) -> 'ADAgent':
         """
@@ -126,7 +153,7 @@ class ADAgent:
             start_t=randint(0, INSTANCE_MAX_WAIT_TIME)
         )
 
-@dataclass
+@dataclass(slots=True)
 class ADSection:
     """
     Genetic representation of the ADS instance section
@@ -135,6 +162,27 @@ class ADSection:
     """
     adcs: List[ADAgent]
 
+    def to_dict(self) -> dict:
+        """
+        Converts the ADS instance section to dict
+
+        :returns: section in JSON format
+        :rtype: dict
+        """
+        return {'adcs': [adc.to_dict() for adc in self.adcs]}
+
+    def clone(self) -> 'ADSection':
+        """
+        Copy the section and every ADS instance in it
+
+        :returns: a copy of this section
+        :rtype: ADSection
+        """
+        return ADSection([adc.clone() for adc in self.adcs])
+
+    def __deepcopy__(self, memo) -> 'ADSection':
+        return self.clone()
+
     def adjust_time(self) -> None:
         """
         Readjusts all ADS instances so that at least 1 ADS instance
@@ -180,6 +228,23 @@ class ADSection:
                 return True
         return False
 
+    def has_any_conflict(self) -> bool:
+        """
+        Checks if at least 1 pair of ADS instances in the section
+        has conflicting trajectory
+
+        :returns: True if conflict exists, False otherwise
+        :rtype: bool
+        """
+        ma = MapParser.get_instance(HD_MAP)
+        adcs = self.adcs
+        # the relation is symmetric, check each unordered pair once
+        for i, ad in enumerate(adcs):
+            for bd in adcs[i + 1:]:
+                if ad.routing != bd.routing and ma.is_conflict_lanes(ad.routing, bd.routing):
+                    return True
+        return False
+
     @staticmethod
     def get_one() -> 'ADSection':
         """
@@ -200,3 +265,17 @@ class ADSection:
             
         result.adjust_time()
         return result
+
+    @staticmethod
+    def get_conflict_one() -> 'ADSection':
+        """
+        Randomly generates an ADS instance section that gurantees at least
+        2 ADS instances have conflicting trajectory
+
+        :returns: randomly generated section with conflict
+        :rtype: ADSection
+        """
+        while True:
+            result = ADSection.get_one()
+            if result.has_any_conflict():
+                return result
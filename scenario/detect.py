@@ -1,6 +1,8 @@
 from typing import List, Dict, Tuple
+import numpy as np
 from apollo.apollo_runner import ApolloRunner
-from apollo.utils import localization_to_obstacle, obstacle_to_polygon
+from apollo.utils_numba import build_polygons, polygon_distances
+from config import APOLLO_VEHICLE_LENGTH, APOLLO_VEHICLE_WIDTH
 from modules.localization.proto.localization_pb2 import LocalizationEstimate
 from scenario import Scenario
 
@@ -22,7 +24,6 @@ class CollisionDetector:
     """
     runners: List[ApolloRunner]
     scenario: Scenario
-    min_distances: Dict[Tuple[int, int], float]
     dist_records: Dict[Tuple[int, int], List[float]]
 
     def __init__(self, runners: List[ApolloRunner], scenario: Scenario):
@@ -31,14 +32,23 @@ class CollisionDetector:
         """
         self.runners = runners
         self.scenario = scenario
-        self.min_distances = {}
-        for i in range(len(runners)):
-            for j in range(i + 1, len(runners)):
-                self.min_distances[(i, j)] = float('inf')
-        self.dist_records = {}
-        for i in range(len(runners)):
-            for j in range(i + 1, len(runners)):
-                self.dist_records[(i, j)] = []
+        # runner index pairs (i, j) with i < j, the min distance of each pair is kept
+        # in an array aligned with them and only converted to a dict when requested
+        self._pair_i, self._pair_j = np.triu_indices(len(runners), k=1)
+        self._pairs = list(zip(self._pair_i.tolist(), self._pair_j.tolist()))
+        self._min = np.full(len(self._pairs), np.inf)
+        self.dist_records = {pair: [] for pair in self._pairs}
+        # x, y, z, heading, length, width buffer every polygon is built from
+        self._buf = np.zeros((len(runners), 6))
+        self._buf[:, 4] = APOLLO_VEHICLE_LENGTH
+        self._buf[:, 5] = APOLLO_VEHICLE_WIDTH
+
+    @property
+    def min_distances(self) -> Dict[Tuple[int, int], float]:
+        """
+        The min distance of each runner pair so far, inf if never measured
+        """
+        return dict(zip(self._pairs, self._min.tolist()))
 
     def get_polygon_dist(self) -> Dict[Tuple[int, int], float]:
         """
@@ -47,44 +57,47 @@ class CollisionDetector:
         :returns: the ADC polygon distance pairs
         :rtype: Dict[Tuple[int, int], float]
         """
+        valid, dists = self._pair_dists()
+        return {pair: d for pair, d, v in zip(self._pairs, dists.tolist(), valid.tolist()) if v}
+
+    def _pair_dists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Measure the ADC polygon distance of every runner pair
+
+        :returns: mask of the pairs where both ADCs are localized, and the distance of every pair
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
         # retrieve localization of running instances
-        locs: Dict[int, LocalizationEstimate] = dict()
-        for runner in self.runners:
+        buf = self._buf
+        present = np.zeros(len(self.runners), dtype=bool)
+        for i, runner in enumerate(self.runners):
             loc: LocalizationEstimate = runner.localization
             if loc and loc.header.module_name == 'SimControl':
-                locs[runner.nid] = runner.localization
-
-        # convert localization into obstacle's polygon in Shapely
-        obs = dict()
-        obs_poly = dict()
-        for k in locs:
-            obs[k] = localization_to_obstacle(k, locs[k])
-            obs_poly[k] = obstacle_to_polygon(obs[k])
-
-        poly_dist: Dict[Tuple[int, int], float] = dict()
-        for i in range(len(self.runners)):
-            for j in range(i + 1, len(self.runners)):
-                if self.runners[i].nid in obs_poly and self.runners[j].nid in obs_poly:
-                    poly_dist[(i, j)] = obs_poly[self.runners[i].nid].distance(obs_poly[self.runners[j].nid])
-        return poly_dist
+                present[i] = True
+                buf[i, 0] = loc.pose.position.x
+                buf[i, 1] = loc.pose.position.y
+                buf[i, 3] = loc.pose.heading
+        # same as to_Point3D, NaN positions that may occur in Apollo are replaced with 0.0
+        buf[:, :2][np.isnan(buf[:, :2])] = 0.0
+
+        # only pairs where both ADCs are localized
+        valid = present[self._pair_i] & present[self._pair_j]
+        # ADCs are rectangles, build every polygon and measure every pair in compiled code
+        dists = polygon_distances(build_polygons(buf))[self._pair_i, self._pair_j]
+        return valid, dists
 
     def detect(self) -> None:
         """
         Detect the current distance between each pair of runners, record the dist_records and update the min_distances
         """
-        cur_dist = self.get_polygon_dist()
+        valid, dists = self._pair_dists()
 
         # save records hasn't been implemented yet, for future optimization extended targets
         # still don't have a good idea about using offline analysis or online-causation monitor (STL)
         # to detect collision times
-        self.dist_records = []
-
-        # update min_distances
-        for pair in cur_dist:
-            if pair not in self.min_distances:
-                self.min_distances[pair] = cur_dist[pair]
-            else:
-                self.min_distances[pair] = min(self.min_distances[pair], cur_dist[pair])
+
+        # update min_distances of the pairs measured in this cycle
+        np.minimum(self._min, dists, out=self._min, where=valid)
 
     def get_min_distances(self) -> Dict[Tuple[int, int], float]:
         """
@@ -5,7 +5,7 @@ from typing import List
 from config import HD_MAP, MAX_PD_COUNT, SCENARIO_UPPER_LIMIT
 from hdmap.parser import MapParser
 
-@dataclass
+@dataclass(slots=True)
 class PDAgent:
     """
     Genetic representation of a single pedestrian
@@ -18,6 +18,27 @@ class PDAgent:
     speed: float
     start_t: float
 
+    def to_dict(self) -> dict:
+        """
+        Converts the pedestrian representation to dict
+
+        :returns: pedestrian representation in JSON format
+        :rtype: dict
+        """
+        return {'cw_id': self.cw_id, 'speed': self.speed, 'start_t': self.start_t}
+
+    def clone(self) -> 'PDAgent':
+        """
+        Copy the pedestrian representation, all fields are immutable
+
+        :returns: a copy of this pedestrian representation
+        :rtype: PDAgent
+        """
+        return PDAgent(self.cw_id, self.speed, self.start_t)
+
+    def __deepcopy__(self, memo) -> 'PDAgent':
+        return self.clone()
+
     @staticmethod
     def get_one() -> 'PDAgent':
         """
@@ -51,7 +72,7 @@ class PDAgent:
             start_t=randint(0, SCENARIO_UPPER_LIMIT)
         )
 
-@dataclass
+@dataclass(slots=True)
 class PDSection:
     """
     Genetic representation of the pedestrian section
@@ -60,6 +81,27 @@ class PDSection:
     """
     pds: List[PDAgent]
 
+    def to_dict(self) -> dict:
+        """
+        Converts the pedestrian section to dict
+
+        :returns: section in JSON format
+        :rtype: dict
+        """
+        return {'pds': [pd.to_dict() for pd in self.pds]}
+
+    def clone(self) -> 'PDSection':
+        """
+        Copy the section and every pedestrian in it
+
+        :returns: a copy of this section
+        :rtype: PDSection
+        """
+        return PDSection([pd.clone() for pd in self.pds])
+
+    def __deepcopy__(self, memo) -> 'PDSection':
+        return self.clone()
+
     def add_agent(self, pd: PDAgent) -> bool:
         '''
         Adds an pedestrian representation to the section
@@ -1,11 +1,12 @@
-import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from logging import Logger
 from typing import List, Optional, Tuple, Dict
 from apollo.container import ApolloContainer
 from apollo.apollo_runner import ApolloRunner
 from apollo.cyber_bridge import Topics
 from apollo.utils import clean_appolo_dir
+from apollo.utils_numba import warm_up
 from broker.factory import BrokerFactory
 from config import SCENARIO_UPPER_LIMIT
 from scenario import Scenario
@@ -32,6 +33,7 @@ class ScenarioRunner:
     is_initialized: bool
     __instance = None
     __runners: List[ApolloRunner]
+    __pool: ThreadPoolExecutor
     min_distances: Dict[Tuple[int, int], float]
 
     def __init__(self, containers: List[ApolloContainer]) -> None:
@@ -42,6 +44,10 @@ class ScenarioRunner:
         self.containers = containers
         self.curr_scenario = None
         self.is_initialized = False
+        # one worker per container, reused to initialize the runners of every scenario
+        self.__pool = ThreadPoolExecutor(max_workers=max(1, len(containers)))
+        # compile the geometry kernels used by the brokers and the collision detector up front
+        warm_up()
         ScenarioRunner.__instance = self
 
     @staticmethod
@@ -70,7 +76,6 @@ class ScenarioRunner:
         nids = random_numeric_id(len(self.curr_scenario.ad_section.adcs))
         self.__runners = list()
         for i, c, a in zip(nids, self.containers, self.curr_scenario.ad_section.adcs):
-            a.apollo_container = c.container_name
             self.__runners.append(
                 ApolloRunner(
                     nid=i,
@@ -81,16 +86,9 @@ class ScenarioRunner:
                 )
             )
 
-        # initialize Apollo instances
-        threads = list()
-        for index in range(len(self.__runners)):
-            threads.append(threading.Thread(
-                target=self.__runners[index].initialize
-            ))
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+        # initialize Apollo instances concurrently, list() waits for all of them
+        # and re-raises the first exception of any runner
+        list(self.__pool.map(ApolloRunner.initialize, self.__runners))
 
         # remove Apollo logs
         clean_appolo_dir()
@@ -119,9 +117,10 @@ class ScenarioRunner:
             print('Error: No chromosome or not initialized')
             return
         # create the distinct broker for each runtime, using Factory Pattern
-        mbk = BrokerFactory().createbk(self.__runners)
+        bkf = BrokerFactory()
+        mbk = bkf.createbk(self.__runners)
         self.logger.info(
-            f'{BrokerFactory().mode} is used for this runtime.'
+            f'{bkf.mode} is used for this runtime.'
         )
         mbk.spin()
         runner_time = 0
@@ -133,11 +132,17 @@ class ScenarioRunner:
         # create the collision detector
         detector = CollisionDetector(self.__runners, self.curr_scenario)
 
+        # cycles are scheduled on a fixed 100 ms period, so the time spent in the cycle
+        # body does not stretch the scenario; overran cycles are counted for diagnosis
+        deadline = time.monotonic()
+        overruns = 0
+        max_overrun = 0.0
+
         # Begin Scenario Cycle
         while True:
             # Publish TrafficLight
-            tld = self.curr_scenario.tl_section.detection(runner_time/1000)
-            mbk.broadcast(Topics.TrafficLight, tld.SerializeToString())
+            tld = self.curr_scenario.tl_section.detection_bytes(runner_time/1000)
+            mbk.broadcast(Topics.TrafficLight, tld)
             # Send Routing
             for ar in self.__runners:
                 if ar.should_send_routing(runner_time/1000):
@@ -155,12 +160,25 @@ class ScenarioRunner:
                 scenario_logger.info('\n')
                 break
 
-            time.sleep(0.1)
+            deadline += 0.1
+            slack = deadline - time.monotonic()
+            if slack > 0:
+                time.sleep(slack)
+            else:
+                # drop the missed deadline instead of running the next cycles back to back
+                overruns += 1
+                max_overrun = max(max_overrun, -slack)
+                deadline = time.monotonic()
             runner_time += 100
             # Sync time for all ApolloRunners, leave for future usage
             for ar in self.__runners:
                 ar.update_time(runner_time)
 
+        if overruns > 0:
+            self.logger.info(
+                f'{overruns} scenario cycles overran the 100 ms period, by up to {max_overrun * 1000:.1f} ms.'
+            )
+
         # get the min_distances from detector
         self.min_distances = detector.get_min_distances()
 
@@ -169,8 +187,8 @@ class ScenarioRunner:
                 r.container.stop_recorder()
             # buffer period for recorders to stop
             time.sleep(2)
-            bk_mode = BrokerFactory().mode
-            bk_param = BrokerFactory().param
+            bk_mode = bkf.mode
+            bk_param = bkf.param
             save_record_files_and_chromosome(
                 timestamp, gen_name, ind_name, fol_name, self.curr_scenario.to_dict(), self.min_distances, bk_mode, bk_param)
 
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import List, Tuple
 from time import time
 import random
 from hdmap.parser import MapParser
@@ -7,7 +7,10 @@ from config import HD_MAP, FORCE_INVALID_TRAFFIC_CONTROL
 from modules.perception.proto.traffic_light_detection_pb2 import (
     TrafficLight, TrafficLightDetection)
 
-@dataclass
+# TrafficLight color of each color name returned by TLConfig.color
+_COLORS = {'GREEN': TrafficLight.GREEN, 'YELLOW': TrafficLight.YELLOW, 'RED': TrafficLight.RED}
+
+@dataclass(slots=True)
 class TLConfig:
     """
     Genetic representation of a single traffic signal,
@@ -24,6 +27,45 @@ class TLConfig:
     duration: List[float]
     delta_t: float
     confidence: float = 1.0
+    # cycle length and the ends of the green and yellow phases, derived from duration
+    _cycle: float = field(init=False, repr=False, compare=False)
+    _g_end: float = field(init=False, repr=False, compare=False)
+    _y_end: float = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        """
+        duration is not changed once the signal is created, so the phase thresholds
+        used by ``color`` every cycle are computed once here
+        """
+        self._g_end = self.duration[0]
+        self._y_end = self.duration[0] + self.duration[1]
+        self._cycle = self._y_end + self.duration[2]
+
+    def to_dict(self) -> dict:
+        """
+        Converts the traffic signal representation to dict
+
+        :returns: traffic signal representation in JSON format
+        :rtype: dict
+        """
+        return {
+            'tid': self.tid,
+            'duration': list(self.duration),
+            'delta_t': self.delta_t,
+            'confidence': self.confidence
+        }
+
+    def clone(self) -> 'TLConfig':
+        """
+        Copy the traffic signal representation field by field
+
+        :returns: a copy of this traffic signal representation
+        :rtype: TLConfig
+        """
+        return TLConfig(self.tid, list(self.duration), self.delta_t, self.confidence)
+
+    def __deepcopy__(self, memo) -> 'TLConfig':
+        return self.clone()
 
     @staticmethod
     def get_one(tid) -> 'TLConfig':
@@ -86,16 +128,16 @@ class TLConfig:
         :returns: color of the traffic signal at time t
         :rtype: str
         """
-        if sum(self.duration) == 0:
+        if self._cycle == 0:
             return 'GREEN'
 
         cur_t = t + self.delta_t
-        mod = cur_t % sum(self.duration)
-        if mod < self.duration[0]:
+        mod = cur_t % self._cycle
+        if mod < self._g_end:
             # Pay attention to boundary values - they cannot be equal, otherwise errors will occur.
             # See boundary value issues related to modular arithmetic in cyclic periods
             return 'GREEN'
-        elif mod < self.duration[0] + self.duration[1]:
+        elif mod < self._y_end:
             # Pay attention to boundary values - they cannot be equal, otherwise errors will occur.
             # See boundary value issues related to modular arithmetic in cyclic periods
             return 'YELLOW'
@@ -124,7 +166,7 @@ class TLConfig:
             if cond == 'NE':
                 yield sig
 
-@dataclass
+@dataclass(slots=True)
 class TrafficSection:
     """
     Genetic representation of the traffic section
@@ -135,6 +177,31 @@ class TrafficSection:
 
     tls: List[TLConfig]
     sequence_num: int = 0
+    # serialized traffic_light records of the last detection, and the signals and colors they encode
+    _lights_tls: tuple = field(default=(), init=False, repr=False, compare=False)
+    _lights_colors: tuple = field(default=(), init=False, repr=False, compare=False)
+    _lights_bytes: bytes = field(default=b'', init=False, repr=False, compare=False)
+
+    def to_dict(self) -> dict:
+        """
+        Converts the traffic section to dict
+
+        :returns: section in JSON format
+        :rtype: dict
+        """
+        return {'tls': [tl.to_dict() for tl in self.tls], 'sequence_num': self.sequence_num}
+
+    def clone(self) -> 'TrafficSection':
+        """
+        Copy the section and every traffic signal in it
+
+        :returns: a copy of this section
+        :rtype: TrafficSection
+        """
+        return TrafficSection([tl.clone() for tl in self.tls], self.sequence_num)
+
+    def __deepcopy__(self, memo) -> 'TrafficSection':
+        return self.clone()
 
     @staticmethod
     def generate_config() -> 'TrafficSection':
@@ -148,21 +215,26 @@ class TrafficSection:
         mp = MapParser.get_instance(HD_MAP)
         signals = list(mp.get_signals())
         random.shuffle(signals)
+        # signals not assigned yet, the shuffled list keeps the random order
+        remaining = set(signals)
         # get a random signal sequence, which is a list of TLConfig instances
 
         while len(signals) > 0:
             curr_sig = signals.pop()
+            if curr_sig not in remaining:
+                continue
+            remaining.remove(curr_sig)
             tl = TLConfig.get_one(curr_sig)
             result.append(tl)
             for sig in tl.get_eq():
                 # Set equavalent TL
-                if sig in signals:
-                    signals.remove(sig)
+                if sig in remaining:
+                    remaining.remove(sig)
                     result.append(tl.generate_sync(sig))
             for sig in tl.get_ne():
                 # Set mutual exclusion TL
-                if sig in signals:
-                    signals.remove(sig)
+                if sig in remaining:
+                    remaining.remove(sig)
                     result.append(tl.generate_exclusion(sig))
         
         return TrafficSection(tls=result)
@@ -190,23 +262,69 @@ class TrafficSection:
         """
 
         tld = TrafficLightDetection()
+        self._fill_header(tld)
+        self._add_lights(tld, self._light_colors(curr_t))
+        return tld
+
+    def detection_bytes(self, curr_t: float) -> bytes:
+        """
+        Serialized version of ``detection``, identical to ``detection(curr_t).SerializeToString()``.
+        The signal colors only change at phase boundaries, so the traffic_light records are
+        serialized once per color change and reused, only the header is serialized every cycle.
+
+        :param float curr_t: current time
+        :returns: serialized TrafficLightDetection message to be sent
+        :rtype: bytes
+        """
+        colors = self._light_colors(curr_t)
+        # the genetic operators replace signals in tls instead of modifying them, so the cached
+        # records still apply while tls holds the very same signal objects. The cache keeps them
+        # referenced, which also keeps a new signal from reusing the id of a replaced one
+        cached = self._lights_tls
+        if (colors != self._lights_colors or len(cached) != len(self.tls)
+                or any(a is not b for a, b in zip(cached, self.tls))):
+            lights = TrafficLightDetection()
+            self._add_lights(lights, colors)
+            self._lights_bytes = lights.SerializeToString()
+            self._lights_tls = tuple(self.tls)
+            self._lights_colors = colors
+        header = TrafficLightDetection()
+        self._fill_header(header)
+        # traffic_light is field 1 and header is field 2, records are serialized in field order
+        return self._lights_bytes + header.SerializeToString()
+
+    def _fill_header(self, tld: TrafficLightDetection) -> None:
+        """
+        Fills the header of a detection message and advances the sequence number
+
+        :param TrafficLightDetection tld: message to be filled
+        """
         tld.header.timestamp_sec = time()
         tld.header.module_name = "MAGGIE"
         tld.header.sequence_num = self.sequence_num
         self.sequence_num += 1
 
-        for k in self.tls:
+    def _light_colors(self, curr_t: float) -> Tuple[int, ...]:
+        """
+        Get the TrafficLight color of every signal at time t
+
+        :param float curr_t: current time
+        :returns: colors in tls order
+        :rtype: Tuple[int, ...]
+        """
+        if FORCE_INVALID_TRAFFIC_CONTROL:
+            return (TrafficLight.GREEN,) * len(self.tls)
+        return tuple(_COLORS.get(k.color(curr_t), TrafficLight.UNKNOWN) for k in self.tls)
+
+    def _add_lights(self, tld: TrafficLightDetection, colors: Tuple[int, ...]) -> None:
+        """
+        Adds every signal with its color to a detection message
+
+        :param TrafficLightDetection tld: message to be filled
+        :param Tuple[int, ...] colors: colors in tls order
+        """
+        for k, cl in zip(self.tls, colors):
             tl = tld.traffic_light.add()
             tl.id = k.tid
             tl.confidence = k.confidence
-            cl = k.color(curr_t)
-            if cl == 'GREEN' or FORCE_INVALID_TRAFFIC_CONTROL:
-                tl.color = TrafficLight.GREEN
-            elif cl == 'YELLOW':
-                tl.color = TrafficLight.YELLOW
-            elif cl == 'RED':
-                tl.color = TrafficLight.RED
-            else:
-                tl.color = TrafficLight.UNKNOWN
-
-        return tld
+            tl.color = cl
@@ -1,12 +1,16 @@
+import atexit
+import csv
 import glob
 import json
 import logging
 import os
 import random
 import shutil
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, TextIO
 from config import APOLLO_ROOT, RECORDS_DIR, STREAM_LOGGING_LEVEL
 import subprocess
+from functools import lru_cache
+from itertools import chain
 
 BK_FILE_MAP = {
     'RadiusBroker': 'radius',
@@ -78,6 +82,65 @@ def random_numeric_id(length:int=5) -> List[int]:
     """
     return sorted(random.sample(range(100000, 999999), k=length))
 
+@lru_cache(maxsize=None)
+def result_csv_path(timestamp: str, bk_type: str, mode: str) -> str:
+    """
+    Gets the path of the csv file collecting the results of a runtime batch
+
+    :param str timestamp: timestamp of this runtime batch
+    :param str bk_type: the type of broker to be used
+    :param str mode: the mode of the main script
+    :returns: path to the csv file
+    :rtype: str
+    """
+    return os.path.join(RECORDS_DIR, timestamp, BK_FILE_MAP.get(bk_type) + '_' + mode + '.csv')
+
+def result_csv_header(bk_type: str, param_list: List[Any]) -> List[str]:
+    """
+    Gets the header of the csv file collecting the results, a parameter, distance and
+    difference column for the source scenario and every follow-up
+
+    :param str bk_type: the type of broker to be used
+    :param List[Any] param_list: the list of parameters for the broker
+    :returns: column names
+    :rtype: List[str]
+    """
+    head = BK_HEAD_MAP.get(bk_type)
+    return [
+        'Generation', 'Individual',
+        *chain.from_iterable((f'{head}_{i}', f'dist_{i}', f'diff_{i}') for i in range(len(param_list) + 1)),
+        'max_diff', 'min_diff'
+    ]
+
+# csv files kept open for appending, keyed by path
+_csv_writers: Dict[str, Tuple[TextIO, Any]] = dict()
+
+def _close_csv_files() -> None:
+    """
+    Closes every csv file opened by ``append_csv_row``
+    """
+    for fp, _ in _csv_writers.values():
+        fp.close()
+    _csv_writers.clear()
+
+atexit.register(_close_csv_files)
+
+def append_csv_row(file_path: str, row: List[Any]) -> None:
+    """
+    Appends a single row to a csv file, in the same format pandas ``to_csv`` produces.
+    The file is opened once and kept open for the rest of the run, it is line buffered
+    so every row reaches the file as soon as it is written and can be followed
+    while the experiment is running
+
+    :param str file_path: path to the csv file
+    :param List[Any] row: values of the row
+    """
+    entry = _csv_writers.get(file_path)
+    if entry is None:
+        fp = open(file_path, 'a', buffering=1, newline='')
+        entry = _csv_writers[file_path] = (fp, csv.writer(fp, lineterminator='\n'))
+    entry[1].writerow(row)
+
 def save_record_files_and_chromosome(timestamp: str, gen_name: str, ind_name: str,
                                     fol_name: str, ch: dict, 
                                     min_distances: Dict[Tuple[int, int], float],
@@ -99,9 +162,15 @@ def save_record_files_and_chromosome(timestamp: str, gen_name: str, ind_name: st
         shutil.rmtree(dest)
         os.makedirs(dest)
 
+    # the records directory is cleaned before the next scenario starts, so the record files
+    # are moved when possible, which is a rename on the same filesystem instead of a full copy
     fileList = glob.glob(f'{APOLLO_ROOT}/records/*')
     for filePath in fileList:
-        shutil.copy2(filePath, dest)
+        try:
+            os.rename(filePath, os.path.join(dest, os.path.basename(filePath)))
+        except OSError:
+            # another filesystem or no permission on the records directory
+            shutil.copy2(filePath, dest)
 
     sc_file = os.path.join(dest, "scenario.json")
     with open(sc_file, 'w') as fp: